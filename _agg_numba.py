@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Summering per nyckel för statistik och grafer
+Kompileras med numba om det finns installerat, annars används np.bincount
+"""
+
+import importlib.util
+
+import numpy as np
+
+# numba importeras först vid första summeringen eftersom importen är tung
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Under så här många rader är np.bincount lika snabb, och import och kompilering
+# av numba skulle kosta mer än hela summeringen
+NUMBA_MIN_ROWS = 1_000_000
+
+def _sum_by_key_loop(keys, vals, nkeys):
+    """Summerar vals per heltalsnyckel med en enkel loop (kompileras med numba)"""
+    out = np.zeros(nkeys)
+    for i in range(keys.size):
+        out[keys[i]] += vals[i]
+    return out
+
+def _sum_by_key_bincount(keys, vals, nkeys):
+    """Summerar vals per heltalsnyckel med np.bincount"""
+    return np.bincount(keys, weights=vals, minlength=nkeys)
+
+_sum_by_key_impl = None
+
+def _select_impl():
+    """Väljer numba-kompilerad summering om det går, annars np.bincount"""
+    if not NUMBA_AVAILABLE:
+        return _sum_by_key_bincount
+    try:
+        from numba import njit
+        # cache=True sparar den kompilerade koden på disk så att bara första
+        # körningen betalar för kompileringen; kräver att källfilen finns på
+        # disk, vilket den inte gör i zipappen
+        return njit(cache=True)(_sum_by_key_loop)
+    except Exception:
+        # Utan diskcache skulle varje start kompilera om, så använd np.bincount
+        return _sum_by_key_bincount
+
+def sum_by_key(keys, vals, nkeys):
+    """Summerar vals per heltalsnyckel 0..nkeys-1"""
+    global _sum_by_key_impl
+    if _sum_by_key_impl is None:
+        _sum_by_key_impl = _select_impl()
+    return _sum_by_key_impl(keys, vals, nkeys)
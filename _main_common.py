@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gemensamma delar för startfilerna main_fas2.py och main_fas3.py
+Varje fas beskrivs med en PhaseConfig; meny, beroendekontroll och
+start av gemensamma lägen hanteras här.
+"""
+
+import os
+import sys
+import argparse
+import functools
+import importlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+# Beroenden som alla faser kräver: (modul, beskrivning)
+BASE_DEPENDENCIES = (
+    # Grundläggande beroenden
+    ("tkinter", "tkinter"),
+    ("sqlite3", "sqlite3"),
+    ("requests", "requests"),
+    # Fas 1 beroenden
+    ("pandas", "pandas (för Excel-export)"),
+    ("reportlab", "reportlab (för PDF-export)"),
+    # Fas 2 beroenden
+    ("matplotlib", "matplotlib (för grafer)"),
+    ("numpy", "numpy (för grafer)"),
+    ("schedule", "schedule (för automatisk backup)"),
+)
+
+# Fil där cProfile-data sparas vid --profile-startup
+PROFILE_FILE = "startup.prof"
+
+@dataclass
+class PhaseConfig:
+    """Beskriver en fas: beroenden, texter och menyval"""
+    # Fasta fält utan standardvärden så att __slots__ fungerar även före Python 3.10
+    __slots__ = ("name", "deps", "title", "banner", "menu", "dispatch", "modes", "install_hint")
+
+    name: str
+    deps: Tuple[Tuple[str, str], ...]
+    title: str
+    banner: str
+    menu: str
+    # Menyval -> hanterare; hanteraren returnerar True om menyn ska stängas
+    dispatch: Dict[str, Callable[[], Optional[bool]]]
+    # Lägen som kan startas direkt med --mode, utan meny
+    modes: Dict[str, Callable[[], Optional[bool]]]
+    # Visas tillsammans med saknade beroenden innan menyn, om satt
+    install_hint: Optional[str]
+
+def _print_bullets(items, prefix="   - "):
+    """Skriver ut en punktlista med ett enda skrivanrop"""
+    if items:
+        sys.stdout.write(prefix + ("\n" + prefix).join(items) + "\n")
+
+def check_dependencies(deps):
+    """Kontrollerar att alla beroenden är installerade"""
+    missing = []
+    for module_name, description in deps:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            missing.append(description)
+    return missing
+
+def show_welcome_screen(config):
+    """Visar välkomstskärm för fasen"""
+    print("=" * 80)
+    print(config.title)
+    print("=" * 80)
+    print()
+    print(config.banner)
+    print()
+    print("=" * 80)
+
+def safe_launch(label):
+    """Dekorator som fångar fel vid start av ett läge och avslutar menyn"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper():
+            try:
+                func()
+            except ImportError as e:
+                print(f"Fel: Kunde inte starta {label}: {e}")
+                print("Kontrollera att alla beroenden är installerade.")
+            except Exception as e:
+                print(f"Fel vid start av {label}: {e}")
+            return True
+        return wrapper
+    return decorator
+
+@safe_launch("förbättrad GUI")
+def run_improved_gui():
+    """Kör förbättrad GUI (Fas 1)"""
+    print("Startar förbättrad GUI (Fas 1)...")
+    from gui_improved import main as improved_gui_main
+    improved_gui_main()
+
+@safe_launch("terminal-läge")
+def run_terminal_mode():
+    """Kör terminal-läge"""
+    print("Startar terminal-läge...")
+    from expense_manager import main as terminal_main
+    terminal_main()
+
+def exit_program():
+    """Avslutar programmet"""
+    print("\nTack för att du använde utgiftshanteraren!")
+    return True
+
+def invalid_choice():
+    """Hanterar ett ogiltigt menyval"""
+    print("Ogiltigt val. Försök igen.")
+    return False
+
+def parse_args(config, argv=None):
+    """Tolkar kommandoradsargument"""
+    parser = argparse.ArgumentParser(description=f"Utgiftshanteraren - {config.name}")
+    parser.add_argument(
+        "--mode",
+        choices=list(config.modes),
+        help="starta ett läge direkt utan välkomstskärm och meny"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help=f"profilera uppstarten (cProfile till {PROFILE_FILE} och -X importtime)"
+    )
+    return parser.parse_args(argv)
+
+def profile_startup(func, argv):
+    """Kör func under cProfile, skriver ut de tio dyraste anropen och returnerar resultatet"""
+    # Starta om tolken med importtidsprofilering så att -X importtime-utdata
+    # hamnar i samma körning som cProfile-mätningen
+    if "PYTHONPROFILEIMPORTTIME" not in os.environ:
+        os.environ["PYTHONPROFILEIMPORTTIME"] = "1"
+        os.execv(sys.executable, [sys.executable, sys.argv[0]] + argv)
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(PROFILE_FILE)
+        print(f"\nProfildata sparad i {PROFILE_FILE}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(10)
+
+def _profile_argv(args):
+    """Bygger om kommandoraden från tolkade argument för omstarten i profile_startup"""
+    argv = ["--profile-startup"]
+    if args.mode:
+        argv += ["--mode", args.mode]
+    return argv
+
+def run_main(config, argv=None):
+    """Gemensam huvudloop: direktstart via --mode eller interaktiv meny"""
+    args = parse_args(config, argv)
+    if args.profile_startup:
+        # Bara uppstarten profileras; menyn körs efteråt så att tid i input() inte mäts
+        show_menu = profile_startup(lambda: _start(config, args), _profile_argv(args))
+    else:
+        show_menu = _start(config, args)
+
+    if show_menu:
+        _menu_loop(config)
+
+def _start(config, args):
+    """Startar valt läge eller förbereder menyn; returnerar True om menyn ska visas"""
+    if args.mode:
+        config.modes[args.mode]()
+        return False
+
+    # Visa välkomstskärm bara vid interaktiv körning
+    if sys.stdout.isatty():
+        show_welcome_screen(config)
+
+    if config.install_hint:
+        missing_deps = check_dependencies(config.deps)
+        if missing_deps:
+            print("Varning: Följande beroenden saknas:")
+            _print_bullets(missing_deps, "  - ")
+            print(f"\n{config.install_hint}")
+            print()
+    return True
+
+def _menu_loop(config):
+    """Kör den interaktiva menyn tills ett val avslutar den"""
+    prompt = f"Välj alternativ (1-{len(config.dispatch)}): "
+    while True:
+        try:
+            print(config.menu)
+            # Internerad sträng ger pekarjämförelse vid uppslag i dispatch-tabellen
+            choice = sys.intern(input(prompt).strip())
+            handler = config.dispatch.get(choice, invalid_choice)
+            if handler():
+                break
+
+        except KeyboardInterrupt:
+            print("\nAvslutar programmet...")
+            break
+        except Exception as e:
+            print(f"Ett oväntat fel uppstod: {e}")
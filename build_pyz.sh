@@ -0,0 +1,33 @@
+#!/bin/bash
+
+# Bygger en fristående zipapp (dist/utgiftshanterare.pyz) av Fas 3
+# Alla moduler förkompileras till bytekod och packas i ett arkiv så att
+# importer inte behöver söka igenom filsystemet vid start. Källfilerna följer
+# med så att arkivet även fungerar med en annan Python-version än den som
+# byggde det (zipimport använder då .py i stället för .pyc).
+
+set -e
+
+BUILD_DIR="build/pyz"
+OUTPUT="dist/utgiftshanterare.pyz"
+
+echo "Bygger zipapp..."
+
+rm -rf "$BUILD_DIR"
+mkdir -p "$BUILD_DIR" dist
+
+# Kopiera bara programmets moduler (inga tester, databaser eller venv)
+for file in *.py; do
+    case "$file" in
+        test_*.py) ;;
+        *) cp "$file" "$BUILD_DIR/" ;;
+    esac
+done
+
+# Förkompilera till bytekod i legacy-layout så att zipimport hittar .pyc direkt
+python3 -m compileall -q -b "$BUILD_DIR"
+
+python3 -m zipapp "$BUILD_DIR" -p "/usr/bin/env python3" -m "main_fas3:main" -o "$OUTPUT"
+
+echo "Klart: $OUTPUT"
+echo "Kör med: python3 $OUTPUT"
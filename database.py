@@ -11,11 +11,18 @@ from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import os
 
+# Sant om utgiftens datum börjar med ett giltigt 'ÅÅÅÅ-MM-DD'; '+0 days' gör att
+# date() normaliserar ogiltiga dagar som 2024-02-30. Datumdelen används som den
+# är eftersom strftime() och date() räknar om tider med tidszon till UTC
+_VALID_DATE_SQL = "date(substr(date, 1, 10), '+0 days') = substr(date, 1, 10)"
+
 class DatabaseManager:
     """Hanterar databasoperationer för utgiftshanteraren"""
     
     def __init__(self, db_path: str = "expense_manager.db"):
         self.db_path = db_path
+        # Räknas upp vid varje skrivning så att cachar ser när data ändrats
+        self.version = 0
         self.init_database()
     
     def init_database(self):
@@ -81,6 +88,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute('INSERT INTO groups (name) VALUES (?)', (name,))
             conn.commit()
+            self.version += 1
             return cursor.lastrowid
     
     def get_all_groups(self) -> List[Dict]:
@@ -130,6 +138,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute('UPDATE groups SET name = ? WHERE id = ?', (name, group_id))
             conn.commit()
+            self.version += 1
             return cursor.rowcount > 0
     
     def delete_group(self, group_id: int) -> bool:
@@ -138,6 +147,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM groups WHERE id = ?', (group_id,))
             conn.commit()
+            self.version += 1
             return cursor.rowcount > 0
     
     def add_participant(self, group_id: int, name: str, email: str = "") -> int:
@@ -149,6 +159,7 @@ class DatabaseManager:
                 (group_id, name, email)
             )
             conn.commit()
+            self.version += 1
             return cursor.lastrowid
     
     def get_participants(self, group_id: int) -> List[Dict]:
@@ -179,6 +190,7 @@ class DatabaseManager:
                 (name, email, participant_id)
             )
             conn.commit()
+            self.version += 1
             return cursor.rowcount > 0
     
     def delete_participant(self, participant_id: int) -> bool:
@@ -187,6 +199,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM participants WHERE id = ?', (participant_id,))
             conn.commit()
+            self.version += 1
             return cursor.rowcount > 0
     
     def add_expense(self, group_id: int, description: str, amount: float, 
@@ -216,6 +229,7 @@ class DatabaseManager:
                     ''', (expense_id, split['participant'], split['share']))
             
             conn.commit()
+            self.version += 1
             return expense_id
     
     def get_expenses(self, group_id: int) -> List[Dict]:
@@ -288,6 +302,7 @@ class DatabaseManager:
                     ''', (expense_id, split['participant'], split['share']))
             
             conn.commit()
+            self.version += 1
             return cursor.rowcount > 0
     
     def delete_expense(self, expense_id: int) -> bool:
@@ -296,6 +311,7 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM expenses WHERE id = ?', (expense_id,))
             conn.commit()
+            self.version += 1
             return cursor.rowcount > 0
     
     def get_group_statistics(self, group_id: int) -> Dict:
@@ -329,6 +345,36 @@ class DatabaseManager:
                 'totals_by_currency': totals_by_currency
             }
     
+    def _get_grouped_totals(self, group_id: int, key_expr: str) -> List[Tuple]:
+        """Summerar och räknar gruppens utgifter per nyckeluttryck i SQL"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {key_expr} AS key, SUM(amount), COUNT(*)
+                FROM expenses
+                WHERE group_id = ?
+                GROUP BY key
+                HAVING key IS NOT NULL
+                ORDER BY key
+            ''', (group_id,))
+            return cursor.fetchall()
+    
+    def get_category_totals(self, group_id: int) -> List[Tuple]:
+        """Hämtar (kategori, summa, antal) per kategori för en grupp"""
+        return self._get_grouped_totals(group_id, "COALESCE(NULLIF(category, ''), 'Okategoriserad')")
+    
+    def get_payer_totals(self, group_id: int) -> List[Tuple]:
+        """Hämtar (betalare, summa, antal) per betalare för en grupp"""
+        return self._get_grouped_totals(group_id, "paid_by")
+    
+    def get_monthly_totals(self, group_id: int) -> List[Tuple]:
+        """Hämtar (ÅÅÅÅ-MM, summa, antal) per månad för en grupp"""
+        return self._get_grouped_totals(group_id, f"CASE WHEN {_VALID_DATE_SQL} THEN substr(date, 1, 7) END")
+    
+    def get_daily_totals(self, group_id: int) -> List[Tuple]:
+        """Hämtar (ÅÅÅÅ-MM-DD, summa, antal) per dag för en grupp"""
+        return self._get_grouped_totals(group_id, f"CASE WHEN {_VALID_DATE_SQL} THEN substr(date, 1, 10) END")
+    
     def get_participant_balances(self, group_id: int, currency: str = "SEK") -> List[Dict]:
         """Beräknar saldon för alla deltagare i en grupp"""
         with sqlite3.connect(self.db_path) as conn:
@@ -381,6 +427,7 @@ class DatabaseManager:
         try:
             import shutil
             shutil.copy2(backup_path, self.db_path)
+            self.version += 1
             return True
         except Exception as e:
             print(f"Fel vid återställning: {e}")
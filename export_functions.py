@@ -369,12 +369,13 @@ class ExportManager:
             
             # Beräkna deltagarstatistik
             participant_stats = {}
+            balance_by_name = {bal['name']: bal['balance'] for bal in balances}
             for p in participants:
                 participant_expenses = [exp for exp in expenses if exp['paid_by'] == p['name']]
                 participant_stats[p['name']] = {
                     'antal_utgifter': len(participant_expenses),
                     'total_betalt': sum(exp['amount'] for exp in participant_expenses),
-                    'saldo': next((bal['balance'] for bal in balances if bal['name'] == p['name']), 0)
+                    'saldo': balance_by_name.get(p['name'], 0)
                 }
             
             report_data = {
@@ -705,6 +705,8 @@ Tillgängliga valutor: {', '.join(self.currency_converter.get_available_currenci
         """Hanterar stängning av applikationen"""
         self.save_settings()
         self.backup_manager.stop_auto_backup()
+        # Skriver valutakurser som ännu bara finns i minnet
+        self.currency_converter.close()
         self.root.destroy()
     
     def run(self):
@@ -324,8 +324,9 @@ class CompleteExpenseManagerGUI:
             
             self.participants_tree.delete(*self.participants_tree.get_children())
             
+            balance_by_name = {bal['name']: bal['balance'] for bal in balances}
             for participant in participants:
-                balance = next((bal['balance'] for bal in balances if bal['name'] == participant['name']), 0)
+                balance = balance_by_name.get(participant['name'], 0)
                 self.participants_tree.insert("", "end", text=str(participant['id']), 
                                            values=(participant['name'], f"{balance:.0f} kr"))
         except Exception as e:
@@ -664,10 +665,16 @@ Version: 3.0
 
     def on_closing(self):
         """Hanterar stängning av applikationen"""
+        # Skriver valutakurser som ännu bara finns i minnet, oavsett hur resten går
+        try:
+            self.currency_converter.close()
+        except Exception as e:
+            print(f"Fel vid stängning av valutakonverterare: {e}")
+        
         try:
             # Stoppa automatisk backup
             if hasattr(self, 'backup_manager'):
-                self.backup_manager.stop_auto_sync()
+                self.backup_manager.stop_auto_backup()
             
             # Stoppa cloud-synkronisering
             if hasattr(self, 'cloud_sync'):
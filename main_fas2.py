@@ -6,231 +6,152 @@ Integrerar alla förbättringar från Fas 1 och Fas 2
 """
 
 import sys
-import os
-import json
-from datetime import datetime
+import importlib.util
 
-def check_dependencies():
-    """Kontrollerar att alla beroenden är installerade"""
-    missing = []
-    
-    # Grundläggande beroenden
-    try:
-        import tkinter
-    except ImportError:
-        missing.append("tkinter")
-    
-    try:
-        import sqlite3
-    except ImportError:
-        missing.append("sqlite3")
-    
-    try:
-        import requests
-    except ImportError:
-        missing.append("requests")
-    
-    # Fas 1 beroenden
-    try:
-        import pandas
-    except ImportError:
-        missing.append("pandas (för Excel-export)")
-    
+from _main_common import (
+    BASE_DEPENDENCIES, PhaseConfig, _print_bullets, check_dependencies,
+    safe_launch, run_improved_gui, run_terminal_mode, exit_program, run_main
+)
+
+DEPENDENCIES = BASE_DEPENDENCIES
+
+BANNER = """Förbättringar i denna version:
+
+FAS 1:
+✓ Förbättrad GUI med tema-stöd
+✓ Sortering och filtrering av data
+✓ Export-funktioner (Excel, PDF, CSV)
+✓ Bättre felhantering och loggning
+✓ Förbättrad prestanda
+✓ Snackbar-meddelanden
+✓ Snabbstart (Ctrl+N, Ctrl+P, Ctrl+E)
+
+FAS 2:
+✓ Statistik och grafer med matplotlib
+✓ Schemalagd säkerhetskopiering
+✓ Offline-läge för valutakurser
+✓ Avancerad UX-förbättringar
+✓ Backup-hantering med GUI
+✓ Valutakonvertering med offline-stöd
+✓ Automatisk datauppdatering"""
+
+MENU = """Välj läge:
+1. Komplett GUI (Fas 2 - rekommenderat)
+2. Förbättrad GUI (Fas 1)
+3. Terminal-läge
+4. Testa funktioner
+5. Systemstatus
+6. Avsluta
+"""
+
+@safe_launch("komplett GUI")
+def run_complete_gui():
+    """Kör komplett GUI (Fas 2)"""
+    print("Startar komplett GUI (Fas 2)...")
+    from gui_fas2_complete import main as complete_gui_main
+    complete_gui_main()
+
+def run_tests():
+    """Kör snabbtester av alla delsystem"""
+    print("Kör tester...")
     try:
-        import reportlab
-    except ImportError:
-        missing.append("reportlab (för PDF-export)")
+        # Testa databas
+        from database import DatabaseManager
+        db = DatabaseManager("test_fas2.db")
+        group_id = db.create_group("Test Grupp Fas 2")
+        print("✓ Databas fungerar")
+        
+        # Testa offline-valuta
+        from offline_currency import OfflineCurrencyConverter
+        converter = OfflineCurrencyConverter()
+        rate = converter.get_exchange_rate("SEK", "USD")
+        print(f"✓ Offline-valuta fungerar (SEK->USD: {rate})")
+        
+        # Testa statistik
+        from statistics_charts import ExpenseStatistics
+        stats = ExpenseStatistics(db)
+        print("✓ Statistik och grafer tillgängliga")
+        
+        # Testa backup
+        from backup_scheduler import BackupManager
+        backup_mgr = BackupManager("test_backup.db")
+        print("✓ Backup-system tillgängligt")
+        
+        # Testa export-funktioner
+        try:
+            from export_functions import ExportManager
+            export_mgr = ExportManager(db)
+            print("✓ Export-funktioner tillgängliga")
+        except ImportError:
+            print("⚠ Export-funktioner kräver ytterligare paket")
+        
+        # Rensa testdata
+        db.delete_group(group_id)
+        print("✓ Alla tester godkända!")
+        
+    except Exception as e:
+        print(f"❌ Test misslyckades: {e}")
+    return True
+
+def show_system_status():
+    """Visar systemstatus"""
+    print("Systemstatus:")
+    print("=" * 50)
     
-    # Fas 2 beroenden
-    try:
-        import matplotlib
-    except ImportError:
-        missing.append("matplotlib (för grafer)")
+    # Kontrollera beroenden
+    deps = check_dependencies(DEPENDENCIES)
+    if deps:
+        print("❌ Saknade beroenden:")
+        _print_bullets(deps)
+    else:
+        print("✅ Alla beroenden installerade")
     
-    try:
-        import numpy
-    except ImportError:
-        missing.append("numpy (för grafer)")
+    # Kontrollera moduler
+    modules = [
+        ("Database", "database"),
+        ("Offline Currency", "offline_currency"),
+        ("Statistics", "statistics_charts"),
+        ("Backup", "backup_scheduler"),
+        ("Export", "export_functions")
+    ]
     
-    try:
-        import schedule
-    except ImportError:
-        missing.append("schedule (för automatisk backup)")
+    # find_spec hittar modulen utan att köra den (och dess tunga beroenden)
+    for name, module in modules:
+        if importlib.util.find_spec(module) is not None:
+            print(f"✅ {name} modul tillgänglig")
+        else:
+            print(f"❌ {name} modul saknas")
     
-    return missing
+    print("=" * 50)
+    return True
 
-def show_welcome_screen():
-    """Visar välkomstskärm för Fas 2"""
-    print("=" * 80)
-    print("    UTGIFTSHANTERARE - KOMPLETT VERSION (FAS 2)")
-    print("=" * 80)
-    print()
-    print("Förbättringar i denna version:")
-    print()
-    print("FAS 1:")
-    print("✓ Förbättrad GUI med tema-stöd")
-    print("✓ Sortering och filtrering av data")
-    print("✓ Export-funktioner (Excel, PDF, CSV)")
-    print("✓ Bättre felhantering och loggning")
-    print("✓ Förbättrad prestanda")
-    print("✓ Snackbar-meddelanden")
-    print("✓ Snabbstart (Ctrl+N, Ctrl+P, Ctrl+E)")
-    print()
-    print("FAS 2:")
-    print("✓ Statistik och grafer med matplotlib")
-    print("✓ Schemalagd säkerhetskopiering")
-    print("✓ Offline-läge för valutakurser")
-    print("✓ Avancerad UX-förbättringar")
-    print("✓ Backup-hantering med GUI")
-    print("✓ Valutakonvertering med offline-stöd")
-    print("✓ Automatisk datauppdatering")
-    print()
-    print("=" * 80)
+PHASE = PhaseConfig(
+    name="Fas 2",
+    deps=DEPENDENCIES,
+    title="    UTGIFTSHANTERARE - KOMPLETT VERSION (FAS 2)",
+    banner=BANNER,
+    menu=MENU,
+    dispatch={
+        "1": run_complete_gui,
+        "2": run_improved_gui,
+        "3": run_terminal_mode,
+        "4": run_tests,
+        "5": show_system_status,
+        "6": exit_program,
+    },
+    modes={
+        "gui": run_complete_gui,
+        "gui1": run_improved_gui,
+        "terminal": run_terminal_mode,
+        "test": run_tests,
+        "status": show_system_status,
+    },
+    install_hint="Installera med: pip install -r requirements_fas2.txt",
+)
 
-def main():
+def main(argv=None):
     """Huvudfunktion för komplett utgiftshanterare"""
-    show_welcome_screen()
-    
-    # Kontrollera beroenden
-    missing_deps = check_dependencies()
-    if missing_deps:
-        print("Varning: Följande beroenden saknas:")
-        for dep in missing_deps:
-            print(f"  - {dep}")
-        print("\nInstallera med: pip install -r requirements_fas2.txt")
-        print()
-    
-    print("Välj läge:")
-    print("1. Komplett GUI (Fas 2 - rekommenderat)")
-    print("2. Förbättrad GUI (Fas 1)")
-    print("3. Terminal-läge")
-    print("4. Testa funktioner")
-    print("5. Systemstatus")
-    print("6. Avsluta")
-    print()
-    
-    while True:
-        try:
-            choice = input("Välj alternativ (1-6): ").strip()
-            
-            if choice == "1":
-                print("Startar komplett GUI (Fas 2)...")
-                try:
-                    from gui_fas2_complete import main as complete_gui_main
-                    complete_gui_main()
-                except ImportError as e:
-                    print(f"Fel: Kunde inte starta komplett GUI: {e}")
-                    print("Kontrollera att alla beroenden är installerade.")
-                except Exception as e:
-                    print(f"Fel vid start av komplett GUI: {e}")
-                break
-                
-            elif choice == "2":
-                print("Startar förbättrad GUI (Fas 1)...")
-                try:
-                    from gui_improved import main as improved_gui_main
-                    improved_gui_main()
-                except ImportError as e:
-                    print(f"Fel: Kunde inte starta förbättrad GUI: {e}")
-                    print("Kontrollera att tkinter är installerat.")
-                except Exception as e:
-                    print(f"Fel vid start av förbättrad GUI: {e}")
-                break
-                
-            elif choice == "3":
-                print("Startar terminal-läge...")
-                try:
-                    from expense_manager import main as terminal_main
-                    terminal_main()
-                except Exception as e:
-                    print(f"Fel vid start av terminal-läge: {e}")
-                break
-                
-            elif choice == "4":
-                print("Kör tester...")
-                try:
-                    # Testa databas
-                    from database import DatabaseManager
-                    db = DatabaseManager("test_fas2.db")
-                    group_id = db.create_group("Test Grupp Fas 2")
-                    print("✓ Databas fungerar")
-                    
-                    # Testa offline-valuta
-                    from offline_currency import OfflineCurrencyConverter
-                    converter = OfflineCurrencyConverter()
-                    rate = converter.get_exchange_rate("SEK", "USD")
-                    print(f"✓ Offline-valuta fungerar (SEK->USD: {rate})")
-                    
-                    # Testa statistik
-                    from statistics_charts import ExpenseStatistics
-                    stats = ExpenseStatistics(db)
-                    print("✓ Statistik och grafer tillgängliga")
-                    
-                    # Testa backup
-                    from backup_scheduler import BackupManager
-                    backup_mgr = BackupManager("test_backup.db")
-                    print("✓ Backup-system tillgängligt")
-                    
-                    # Testa export-funktioner
-                    try:
-                        from export_functions import ExportManager
-                        export_mgr = ExportManager(db)
-                        print("✓ Export-funktioner tillgängliga")
-                    except ImportError:
-                        print("⚠ Export-funktioner kräver ytterligare paket")
-                    
-                    # Rensa testdata
-                    db.delete_group(group_id)
-                    print("✓ Alla tester godkända!")
-                    
-                except Exception as e:
-                    print(f"❌ Test misslyckades: {e}")
-                break
-                
-            elif choice == "5":
-                print("Systemstatus:")
-                print("=" * 50)
-                
-                # Kontrollera beroenden
-                deps = check_dependencies()
-                if deps:
-                    print("❌ Saknade beroenden:")
-                    for dep in deps:
-                        print(f"   - {dep}")
-                else:
-                    print("✅ Alla beroenden installerade")
-                
-                # Kontrollera moduler
-                modules = [
-                    ("Database", "database"),
-                    ("Offline Currency", "offline_currency"),
-                    ("Statistics", "statistics_charts"),
-                    ("Backup", "backup_scheduler"),
-                    ("Export", "export_functions")
-                ]
-                
-                for name, module in modules:
-                    try:
-                        __import__(module)
-                        print(f"✅ {name} modul tillgänglig")
-                    except ImportError:
-                        print(f"❌ {name} modul saknas")
-                
-                print("=" * 50)
-                break
-                
-            elif choice == "6":
-                print("Avslutar programmet...")
-                break
-                
-            else:
-                print("Ogiltigt val. Försök igen.")
-                
-        except KeyboardInterrupt:
-            print("\nAvslutar programmet...")
-            break
-        except Exception as e:
-            print(f"Ett oväntat fel uppstod: {e}")
+    run_main(PHASE, argv)
 
 def show_help():
     """Visar hjälpinformation för Fas 2"""
@@ -7,175 +7,120 @@ Integrerar alla förbättringar från Fas 1, 2 och 3
 
 import sys
 import os
-import json
-from datetime import datetime
+import subprocess
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
-def check_dependencies():
-    """Kontrollerar att alla beroenden är installerade"""
-    missing = []
-
-    # Grundläggande beroenden
-    try:
-        import tkinter
-    except ImportError:
-        missing.append("tkinter")
-
-    try:
-        import sqlite3
-    except ImportError:
-        missing.append("sqlite3")
-
-    try:
-        import requests
-    except ImportError:
-        missing.append("requests")
-
-    # Fas 1 beroenden
-    try:
-        import pandas
-    except ImportError:
-        missing.append("pandas (för Excel-export)")
-
-    try:
-        import reportlab
-    except ImportError:
-        missing.append("reportlab (för PDF-export)")
-
-    # Fas 2 beroenden
-    try:
-        import matplotlib
-    except ImportError:
-        missing.append("matplotlib (för grafer)")
-
-    try:
-        import numpy
-    except ImportError:
-        missing.append("numpy (för grafer)")
-
-    try:
-        import schedule
-    except ImportError:
-        missing.append("schedule (för automatisk backup)")
+from _main_common import (
+    BASE_DEPENDENCIES, PhaseConfig, _print_bullets, check_dependencies,
+    safe_launch, run_improved_gui, run_terminal_mode, exit_program, run_main
+)
 
+DEPENDENCIES = BASE_DEPENDENCIES + (
     # Fas 3 beroenden
-    try:
-        import scikit_learn
-    except ImportError:
-        missing.append("scikit-learn (för AI-funktioner)")
-
-    try:
-        import scipy
-    except ImportError:
-        missing.append("scipy (för AI-funktioner)")
-
-    return missing
-
-def show_welcome_screen():
-    """Visar välkomstskärm"""
-    print("=" * 80)
-    print("VÄLKOMMEN TILL UTGIFTSHANTERAREN - FAS 3")
-    print("=" * 80)
-    print()
-    print("En avancerad applikation för att hantera utgifter och splitta dem mellan gruppdeltagare.")
-    print()
-    print("FUNKTIONER PER FAS:")
-    print()
-    print("FAS 1 - Förbättrad GUI och Export:")
-    print("  • Förbättrad GUI med tema-stöd (ljus/mörk)")
-    print("  • Sortering och filtrering av data")
-    print("  • Snackbar-meddelanden och statusrad")
-    print("  • Tangentbordskort (Ctrl+N, Ctrl+E, Ctrl+P)")
-    print("  • Dubbelklick-redigering")
-    print("  • Export till Excel (.xlsx), PDF, CSV och JSON")
-    print()
-    print("FAS 2 - Statistik, Backup och Offline-valuta:")
-    print("  • Statistik och grafer med matplotlib")
-    print("  • Schemalagd säkerhetskopiering")
-    print("  • Offline-valutakonvertering med caching")
-    print("  • Backup-verifiering och komprimering")
-    print()
-    print("FAS 3 - Cloud-synkronisering, AI och Avancerad rapportering:")
-    print("  • Cloud-synkronisering med REST API")
-    print("  • AI-baserade rekommendationer och förutsägelser")
-    print("  • Avancerad rapportering med anpassningsbara mallar")
-    print("  • Konfliktlösning för synkronisering")
-    print("  • Maskininlärning för utgiftsanalys")
-    print()
-    print("=" * 80)
+    ("sklearn", "scikit-learn (för AI-funktioner)"),
+    ("scipy", "scipy (för AI-funktioner)"),
+)
+
+BANNER = """En avancerad applikation för att hantera utgifter och splitta dem mellan gruppdeltagare.
+
+FUNKTIONER PER FAS:
+
+FAS 1 - Förbättrad GUI och Export:
+  • Förbättrad GUI med tema-stöd (ljus/mörk)
+  • Sortering och filtrering av data
+  • Snackbar-meddelanden och statusrad
+  • Tangentbordskort (Ctrl+N, Ctrl+E, Ctrl+P)
+  • Dubbelklick-redigering
+  • Export till Excel (.xlsx), PDF, CSV och JSON
+
+FAS 2 - Statistik, Backup och Offline-valuta:
+  • Statistik och grafer med matplotlib
+  • Schemalagd säkerhetskopiering
+  • Offline-valutakonvertering med caching
+  • Backup-verifiering och komprimering
+
+FAS 3 - Cloud-synkronisering, AI och Avancerad rapportering:
+  • Cloud-synkronisering med REST API
+  • AI-baserade rekommendationer och förutsägelser
+  • Avancerad rapportering med anpassningsbara mallar
+  • Konfliktlösning för synkronisering
+  • Maskininlärning för utgiftsanalys"""
+
+MENU = """
+VÄLJ ALTERNATIV:
+1. Komplett GUI (Fas 3 - rekommenderat)
+2. Förbättrad GUI (Fas 1)
+3. Terminal-läge
+4. Testa funktioner
+5. Systemstatus
+6. Installera beroenden
+7. Avsluta
+"""
 
-def show_menu():
-    """Visar huvudmeny"""
-    print("\nVÄLJ ALTERNATIV:")
-    print("1. Komplett GUI (Fas 3 - rekommenderat)")
-    print("2. Förbättrad GUI (Fas 1)")
-    print("3. Terminal-läge")
-    print("4. Testa funktioner")
-    print("5. Systemstatus")
-    print("6. Installera beroenden")
-    print("7. Avsluta")
-    print()
+# (rubrik, etikett, modul, attribut) för varje funktion som testas
+FUNCTION_PROBES = [
+    ("1. Testar grundläggande funktioner...", "Databas", "database", "DatabaseManager"),
+    ("1. Testar grundläggande funktioner...", "Valutakonverterare", "expense_manager", "CurrencyConverter"),
+    ("2. Testar Fas 1 funktioner...", "Export-funktioner", "export_functions", "ExportManager"),
+    ("3. Testar Fas 2 funktioner...", "Statistik och grafer", "statistics_charts", "ExpenseStatistics"),
+    ("3. Testar Fas 2 funktioner...", "Backup-hantering", "backup_scheduler", "BackupManager"),
+    ("3. Testar Fas 2 funktioner...", "Offline-valuta", "offline_currency", "OfflineCurrencyConverter"),
+    ("4. Testar Fas 3 funktioner...", "Cloud-synkronisering", "cloud_sync", "CloudSyncManager"),
+    ("4. Testar Fas 3 funktioner...", "AI-rekommendationer", "ai_recommendations", "AIRecommendationEngine"),
+    ("4. Testar Fas 3 funktioner...", "Avancerad rapportering", "advanced_reporting", "AdvancedReportingEngine"),
+]
+
+# Moduler som rör matplotlibs globala tillstånd vid import (backend, pyplot);
+# de importeras efter varandra i stället för i trådpoolen
+SERIAL_PROBE_MODULES = {"statistics_charts", "advanced_reporting"}
+
+def _probe_module(module_name, attr):
+    """Importerar en modul och hämtar ett attribut"""
+    # import_module returnerar redan laddade moduler men väntar på importlåset,
+    # så en modul som en annan tråd håller på att importera ses aldrig halvfärdig
+    return getattr(importlib.import_module(module_name), attr)
+
+def _safe_probe(probe):
+    """Kör en probe och returnerar (ok, fel) i stället för att kasta"""
+    _, _, module_name, attr = probe
+    try:
+        _probe_module(module_name, attr)
+        return True, None
+    except Exception as e:
+        return False, e
 
 def test_functions():
     """Testar olika funktioner"""
     print("\nTESTAR FUNKTIONER...")
     print("=" * 50)
     
-    # Testa grundläggande funktioner
-    print("1. Testar grundläggande funktioner...")
-    try:
-        from database import DatabaseManager
-        from expense_manager import CurrencyConverter
-        print("   ✓ Databas och valutakonverterare OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    # Testa Fas 1 funktioner
-    print("2. Testar Fas 1 funktioner...")
-    try:
-        from export_functions import ExportManager
-        print("   ✓ Export-funktioner OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    # Testa Fas 2 funktioner
-    print("3. Testar Fas 2 funktioner...")
-    try:
-        from statistics_charts import ExpenseStatistics
-        print("   ✓ Statistik och grafer OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    try:
-        from backup_scheduler import BackupManager
-        print("   ✓ Backup-hantering OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    try:
-        from offline_currency import OfflineCurrencyConverter
-        print("   ✓ Offline-valuta OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    # Testa Fas 3 funktioner
-    print("4. Testar Fas 3 funktioner...")
-    try:
-        from cloud_sync import CloudSyncManager
-        print("   ✓ Cloud-synkronisering OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    try:
-        from ai_recommendations import AIRecommendationEngine
-        print("   ✓ AI-rekommendationer OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
-    
-    try:
-        from advanced_reporting import AdvancedReportingEngine
-        print("   ✓ Avancerad rapportering OK")
-    except Exception as e:
-        print(f"   ✗ Fel: {e}")
+    # Importera oberoende moduler parallellt; filsystem- och C-tilläggsladdning
+    # överlappar medan matplotlib-modulerna importeras en i taget i denna tråd
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            i: executor.submit(_safe_probe, probe)
+            for i, probe in enumerate(FUNCTION_PROBES)
+            if probe[2] not in SERIAL_PROBE_MODULES
+        }
+        serial = {
+            i: _safe_probe(probe)
+            for i, probe in enumerate(FUNCTION_PROBES)
+            if probe[2] in SERIAL_PROBE_MODULES
+        }
+    results = [futures[i].result() if i in futures else serial[i] for i in range(len(FUNCTION_PROBES))]
+    
+    # Skriv ut i definitionsordning
+    current_section = None
+    for (section, label, _, _), (ok, error) in zip(FUNCTION_PROBES, results):
+        if section != current_section:
+            print(section)
+            current_section = section
+        if ok:
+            print(f"   ✓ {label} OK")
+        else:
+            print(f"   ✗ {label}: {error}")
     
     print("\nTestning slutförd!")
 
@@ -185,11 +130,10 @@ def show_system_status():
     print("=" * 50)
     
     # Kontrollera beroenden
-    missing = check_dependencies()
+    missing = check_dependencies(DEPENDENCIES)
     if missing:
         print("❌ Saknade beroenden:")
-        for dep in missing:
-            print(f"   - {dep}")
+        _print_bullets(missing)
     else:
         print("✅ Alla beroenden installerade")
     
@@ -206,14 +150,15 @@ def show_system_status():
         "cloud_sync.py",
         "ai_recommendations.py",
         "advanced_reporting.py",
-        "gui_fas3_complete.py"
+        "gui_fas3_complete.py",
+        "_main_common.py"
     ]
     
-    for file in required_files:
-        if os.path.exists(file):
-            print(f"   ✅ {file}")
-        else:
-            print(f"   ❌ {file} (saknas)")
+    _print_bullets(
+        [f"✅ {file}" if os.path.exists(file) else f"❌ {file} (saknas)"
+         for file in required_files],
+        "   "
+    )
     
     # Kontrollera databas
     print("\nDatabas:")
@@ -242,8 +187,18 @@ def install_dependencies():
     
     # Installera från requirements_fas3.txt
     if os.path.exists("requirements_fas3.txt"):
+        if importlib.util.find_spec("pip") is None:
+            print("❌ pip saknas för den aktuella Python-tolken")
+            return
         print("Installerar från requirements_fas3.txt...")
-        os.system("pip install -r requirements_fas3.txt")
+        # Kör pip via aktuell tolk så att rätt miljö används
+        result = subprocess.run(
+            [sys.executable, "-m", "pip", "install", "-r", "requirements_fas3.txt"],
+            check=False
+        )
+        if result.returncode != 0:
+            print(f"\n❌ Installationen misslyckades (returkod {result.returncode})")
+            return
     else:
         print("❌ requirements_fas3.txt saknas")
         return
@@ -251,73 +206,43 @@ def install_dependencies():
     print("\n✅ Installation slutförd!")
     print("Kör 'python main_fas3.py' igen för att starta applikationen.")
 
+@safe_launch("komplett GUI")
 def run_complete_gui():
     """Kör komplett GUI (Fas 3)"""
-    try:
-        from gui_fas3_complete import CompleteExpenseManagerGUI
-        print("Startar komplett GUI (Fas 3)...")
-        app = CompleteExpenseManagerGUI()
-        app.run()
-    except Exception as e:
-        print(f"Fel vid start av komplett GUI: {e}")
-        print("Kontrollera att alla beroenden är installerade.")
-
-def run_improved_gui():
-    """Kör förbättrad GUI (Fas 1)"""
-    try:
-        from gui_improved import ImprovedExpenseManagerGUI
-        print("Startar förbättrad GUI (Fas 1)...")
-        app = ImprovedExpenseManagerGUI()
-        app.run()
-    except Exception as e:
-        print(f"Fel vid start av förbättrad GUI: {e}")
-
-def run_terminal_mode():
-    """Kör terminal-läge"""
-    try:
-        from expense_manager import ExpenseManager
-        print("Startar terminal-läge...")
-        manager = ExpenseManager()
-        manager.run()
-    except Exception as e:
-        print(f"Fel vid start av terminal-läge: {e}")
-
-def main():
+    from gui_fas3_complete import CompleteExpenseManagerGUI
+    print("Startar komplett GUI (Fas 3)...")
+    app = CompleteExpenseManagerGUI()
+    app.run()
+
+PHASE = PhaseConfig(
+    name="Fas 3",
+    deps=DEPENDENCIES,
+    title="VÄLKOMMEN TILL UTGIFTSHANTERAREN - FAS 3",
+    banner=BANNER,
+    menu=MENU,
+    dispatch={
+        "1": run_complete_gui,
+        "2": run_improved_gui,
+        "3": run_terminal_mode,
+        "4": test_functions,
+        "5": show_system_status,
+        "6": install_dependencies,
+        "7": exit_program,
+    },
+    modes={
+        "gui": run_complete_gui,
+        "gui1": run_improved_gui,
+        "terminal": run_terminal_mode,
+        "test": test_functions,
+        "status": show_system_status,
+        "install": install_dependencies,
+    },
+    install_hint=None,
+)
+
+def main(argv=None):
     """Huvudfunktion"""
-    # Visa välkomstskärm
-    show_welcome_screen()
-    
-    while True:
-        try:
-            show_menu()
-            choice = input("Ange ditt val (1-7): ").strip()
-            
-            if choice == "1":
-                run_complete_gui()
-                break
-            elif choice == "2":
-                run_improved_gui()
-                break
-            elif choice == "3":
-                run_terminal_mode()
-                break
-            elif choice == "4":
-                test_functions()
-            elif choice == "5":
-                show_system_status()
-            elif choice == "6":
-                install_dependencies()
-            elif choice == "7":
-                print("\nTack för att du använde utgiftshanteraren!")
-                break
-            else:
-                print("Ogiltigt val. Försök igen.")
-                
-        except KeyboardInterrupt:
-            print("\n\nAvslutar...")
-            break
-        except Exception as e:
-            print(f"Ett oväntat fel uppstod: {e}")
+    run_main(PHASE, argv)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -5,115 +5,252 @@ Offline-läge för valutakurser
 Lokal caching och fallback-kurser
 """
 
+import atexit
 import json
 import os
 import sqlite3
+import weakref
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, List, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _dumps(obj) -> bytes:
+    """Serialiserar till JSON-bytes, med orjson om det finns"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+def _loads(data: bytes):
+    """Tolkar JSON-bytes, med orjson om det finns"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Fallback-kurser för offline-läge
+_FALLBACK_RATES = {
+    'SEK': {
+        'USD': 0.11,
+        'EUR': 0.10,
+        'GBP': 0.085,
+        'NOK': 1.05,
+        'DKK': 0.75
+    },
+    'USD': {
+        'SEK': 9.0,
+        'EUR': 0.92,
+        'GBP': 0.78,
+        'NOK': 9.5,
+        'DKK': 6.8
+    },
+    'EUR': {
+        'SEK': 9.8,
+        'USD': 1.09,
+        'GBP': 0.85,
+        'NOK': 10.3,
+        'DKK': 7.4
+    },
+    'GBP': {
+        'SEK': 11.5,
+        'USD': 1.28,
+        'EUR': 1.18,
+        'NOK': 12.1,
+        'DKK': 8.7
+    },
+    'NOK': {
+        'SEK': 0.95,
+        'USD': 0.105,
+        'EUR': 0.097,
+        'GBP': 0.083,
+        'DKK': 0.72
+    },
+    'DKK': {
+        'SEK': 1.33,
+        'USD': 0.147,
+        'EUR': 0.135,
+        'GBP': 0.115,
+        'NOK': 1.39
+    }
+}
+
+# Skrivskyddad, även per basvaluta, så att en konverterare inte kan ändra kurserna
+# för alla andra eller få dem ur takt med _FALLBACK_PAIRS
+FALLBACK_RATES = MappingProxyType({
+    base: MappingProxyType(targets) for base, targets in _FALLBACK_RATES.items()
+})
+
+def _build_fallback_pairs(rates: Mapping) -> Dict[str, float]:
+    """Plattar ut fallback-kurserna till "FRÅN_TILL" inklusive omvända kurser"""
+    pairs = {}
+    for from_currency, targets in rates.items():
+        for to_currency, rate in targets.items():
+            pairs[f"{from_currency}_{to_currency}"] = rate
+    
+    # Omvänd kurs används bara där det inte finns en direkt kurs
+    for from_currency, targets in rates.items():
+        for to_currency, rate in targets.items():
+            pairs.setdefault(f"{to_currency}_{from_currency}", 1 / rate)
+    
+    return pairs
+
+_FALLBACK_PAIRS = _build_fallback_pairs(FALLBACK_RATES)
+
+def _flush_at_exit(converter_ref):
+    """Skriver osparad cache vid programslut om konverteraren fortfarande finns"""
+    converter = converter_ref()
+    if converter is not None:
+        converter.flush()
 
 class OfflineCurrencyConverter:
     """Förbättrad valutakonverterare med offline-stöd"""
     
+    # Minsta tid i sekunder mellan två skrivningar av cachefilen
+    CACHE_FLUSH_INTERVAL = 2.0
+    # Hur länge i sekunder ett resultat från anslutningskontrollen återanvänds
+    ONLINE_CHECK_TTL = 60.0
+    
     def __init__(self, cache_file: str = "currency_cache.json", db_file: str = "currency_rates.db"):
         self.cache_file = cache_file
         self.db_file = db_file
         self.api_url = "https://api.exchangerate-api.com/v4/latest/"
         self.fallback_rates = self.get_fallback_rates()
+        self.session = self.create_session()
+        self._cache_dirty = False
+        self._last_flush = 0.0
+        # Sorterad valutalista; nollställs när databasen ändras
+        self._currencies_cache = None
+        # Senaste kända anslutningsstatus (None innan första kontrollen)
+        self._online = None
+        self._online_checked_until = 0.0
+        # En långlivad anslutning delas mellan trådar och skyddas av ett lås;
+        # den öppnas vid första användning så att fel fångas av anropande metod
+        self._db_lock = threading.Lock()
+        self._connection = None
         self.setup_database()
         self.load_cache()
+        # __del__ körs inte säkert vid programslut; svag referens så att
+        # registreringen inte håller objektet vid liv
+        atexit.register(_flush_at_exit, weakref.ref(self))
+    
+    def create_session(self) -> requests.Session:
+        """Skapar en HTTP-session med connection pooling och keep-alive"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+    
+    def close(self):
+        """Skriver osparad cache och stänger HTTP-sessionen och databasen"""
+        self.flush()
+        self.session.close()
+        with self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def __del__(self):
+        """Skriver osparad cache när objektet tas bort"""
+        try:
+            self.flush()
+        except Exception:
+            pass
+    
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Returnerar den delade anslutningen och öppnar den vid behov"""
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Öppnar en databasanslutning med inställningar för snabba skrivningar"""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        # Dessa PRAGMA gäller per anslutning (journal_mode=WAL sparas i filen)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=67108864")
+        return conn
     
     def setup_database(self):
         """Sätter upp databas för valutakurser"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            # Skapa tabell för valutakurser
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS currency_rates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    from_currency TEXT NOT NULL,
-                    to_currency TEXT NOT NULL,
-                    rate REAL NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    source TEXT DEFAULT 'api'
-                )
-            ''')
-            
-            # Skapa index för snabbare sökningar
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_currency_pair 
-                ON currency_rates(from_currency, to_currency)
-            ''')
-            
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_timestamp 
-                ON currency_rates(timestamp)
-            ''')
-            
-            conn.commit()
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                # WAL ger en fsync per commit och låter läsare köra parallellt med skrivare
+                cursor.execute("PRAGMA journal_mode=WAL")
+                
+                # Äldre databaser har en id-kolumn; flytta över dem till det nya schemat
+                cursor.execute('PRAGMA table_info(currency_rates)')
+                columns = [row[1] for row in cursor.fetchall()]
+                if 'id' in columns:
+                    cursor.execute('ALTER TABLE currency_rates RENAME TO currency_rates_old')
+                
+                # Skapa tabell för valutakurser, klustrad på valutapar och tid så att
+                # uppslag per par läser direkt ur primärnyckelns B-träd
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS currency_rates (
+                        from_currency TEXT NOT NULL,
+                        to_currency TEXT NOT NULL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        rate REAL NOT NULL,
+                        source TEXT DEFAULT 'api',
+                        PRIMARY KEY (from_currency, to_currency, timestamp)
+                    ) WITHOUT ROWID
+                ''')
+                
+                if 'id' in columns:
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO currency_rates (from_currency, to_currency, timestamp, rate, source)
+                        SELECT from_currency, to_currency, timestamp, rate, source
+                        FROM currency_rates_old ORDER BY id
+                    ''')
+                    cursor.execute('DROP TABLE currency_rates_old')
+                
+                # Primärnyckeln täcker uppslag per valutapar
+                cursor.execute('DROP INDEX IF EXISTS idx_currency_pair')
+                cursor.execute('DROP INDEX IF EXISTS idx_pair_ts')
+                
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_timestamp 
+                    ON currency_rates(timestamp)
+                ''')
             
         except Exception as e:
             print(f"Fel vid uppsättning av valutadatabas: {e}")
     
-    def get_fallback_rates(self) -> Dict:
+    def get_fallback_rates(self) -> Mapping:
         """Returnerar fallback-kurser för offline-läge"""
-        return {
-            'SEK': {
-                'USD': 0.11,
-                'EUR': 0.10,
-                'GBP': 0.085,
-                'NOK': 1.05,
-                'DKK': 0.75
-            },
-            'USD': {
-                'SEK': 9.0,
-                'EUR': 0.92,
-                'GBP': 0.78,
-                'NOK': 9.5,
-                'DKK': 6.8
-            },
-            'EUR': {
-                'SEK': 9.8,
-                'USD': 1.09,
-                'GBP': 0.85,
-                'NOK': 10.3,
-                'DKK': 7.4
-            },
-            'GBP': {
-                'SEK': 11.5,
-                'USD': 1.28,
-                'EUR': 1.18,
-                'NOK': 12.1,
-                'DKK': 8.7
-            },
-            'NOK': {
-                'SEK': 0.95,
-                'USD': 0.105,
-                'EUR': 0.097,
-                'GBP': 0.083,
-                'DKK': 0.72
-            },
-            'DKK': {
-                'SEK': 1.33,
-                'USD': 0.147,
-                'EUR': 0.135,
-                'GBP': 0.115,
-                'NOK': 1.39
-            }
-        }
+        return FALLBACK_RATES
     
     def load_cache(self):
         """Laddar cachade valutakurser"""
         try:
             if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    self.cache = json.load(f)
+                with open(self.cache_file, 'rb') as f:
+                    self.cache = _loads(f.read())
             else:
                 self.cache = {}
+            
+            # Äldre poster har bara ISO-tid; räkna om till epoch-sekunder en gång
+            for entry in self.cache.values():
+                if isinstance(entry, dict) and 'ts_epoch' not in entry and 'timestamp' in entry:
+                    try:
+                        entry['ts_epoch'] = datetime.fromisoformat(entry['timestamp']).timestamp()
+                    except (TypeError, ValueError):
+                        pass
         except Exception as e:
             print(f"Fel vid laddning av valutacache: {e}")
             self.cache = {}
@@ -121,11 +258,18 @@ class OfflineCurrencyConverter:
     def save_cache(self):
         """Sparar cachade valutakurser"""
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with open(self.cache_file, 'wb') as f:
+                f.write(_dumps(self.cache))
         except Exception as e:
             print(f"Fel vid sparande av valutacache: {e}")
     
+    def flush(self):
+        """Skriver cachen till fil om den har ändrats sedan senaste skrivning"""
+        if self._cache_dirty:
+            self.save_cache()
+            self._cache_dirty = False
+        self._last_flush = time.time()
+    
     def is_cache_valid(self, from_currency: str, to_currency: str, max_age_hours: int = 24) -> bool:
         """Kontrollerar om cachad kurs är giltig"""
         cache_key = f"{from_currency}_{to_currency}"
@@ -134,15 +278,11 @@ class OfflineCurrencyConverter:
             return False
         
         cached_data = self.cache[cache_key]
-        if 'timestamp' not in cached_data:
+        # Filen delas med CurrencyConverter som sparar kurser utan tidsstämpel
+        if not isinstance(cached_data, dict) or 'ts_epoch' not in cached_data:
             return False
         
-        try:
-            cached_time = datetime.fromisoformat(cached_data['timestamp'])
-            age = datetime.now() - cached_time
-            return age.total_seconds() < (max_age_hours * 3600)
-        except:
-            return False
+        return time.time() - cached_data['ts_epoch'] < max_age_hours * 3600
     
     def get_cached_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
         """Hämtar cachad valutakurs"""
@@ -157,48 +297,68 @@ class OfflineCurrencyConverter:
         """Sparar valutakurs till cache"""
         cache_key = f"{from_currency}_{to_currency}"
         
+        now = time.time()
         self.cache[cache_key] = {
             'rate': rate,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
+            'ts_epoch': now,
             'source': 'api'
         }
         
-        self.save_cache()
+        # Samla ihop skrivningar så att en batch av kurser inte skriver om filen per kurs
+        self._cache_dirty = True
+        if time.time() - self._last_flush > self.CACHE_FLUSH_INTERVAL:
+            self.flush()
     
     def save_rate_to_database(self, from_currency: str, to_currency: str, rate: float, source: str = 'api'):
         """Sparar valutakurs till databas"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO currency_rates (from_currency, to_currency, rate, source)
-                VALUES (?, ?, ?, ?)
-            ''', (from_currency, to_currency, rate, source))
-            
-            conn.commit()
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO currency_rates (from_currency, to_currency, rate, source)
+                    VALUES (?, ?, ?, ?)
+                ''', (from_currency, to_currency, rate, source))
+            self._currencies_cache = None
             
         except Exception as e:
             print(f"Fel vid sparande av valutakurs till databas: {e}")
     
+    def save_rates_to_database(self, rows: List[Tuple[str, str, float, str]]):
+        """Sparar flera valutakurser till databas i en enda transaktion"""
+        if not rows:
+            return
+        
+        try:
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO currency_rates (from_currency, to_currency, rate, source)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+            self._currencies_cache = None
+            
+        except Exception as e:
+            print(f"Fel vid sparande av valutakurser till databas: {e}")
+    
     def get_rate_from_database(self, from_currency: str, to_currency: str, max_age_hours: int = 168) -> Optional[float]:
         """Hämtar valutakurs från databas"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            # Hämta senaste kursen inom max_age_hours
-            cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-            
-            cursor.execute('''
-                SELECT rate, timestamp FROM currency_rates 
-                WHERE from_currency = ? AND to_currency = ? AND timestamp > ?
-                ORDER BY timestamp DESC LIMIT 1
-            ''', (from_currency, to_currency, cutoff_time.isoformat()))
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                # Hämta senaste kursen inom max_age_hours
+                cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
+                
+                cursor.execute('''
+                    SELECT rate, timestamp FROM currency_rates 
+                    WHERE from_currency = ? AND to_currency = ? AND timestamp > ?
+                    ORDER BY timestamp DESC LIMIT 1
+                ''', (from_currency, to_currency, cutoff_time.isoformat()))
+                
+                result = cursor.fetchone()
             
             if result:
                 return result[0]
@@ -208,24 +368,30 @@ class OfflineCurrencyConverter:
         
         return None
     
+    def _fetch_base(self, base_currency: str) -> Optional[Dict[str, float]]:
+        """Hämtar alla kurser för en basvaluta i ett enda API-anrop"""
+        url = f"{self.api_url}{base_currency}"
+        response = self.session.get(url, timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            return data.get('rates', {})
+        
+        return None
+    
     def fetch_rate_from_api(self, from_currency: str, to_currency: str) -> Optional[float]:
         """Hämtar valutakurs från API"""
         try:
-            url = f"{self.api_url}{from_currency}"
-            response = requests.get(url, timeout=10)
+            rates = self._fetch_base(from_currency)
             
-            if response.status_code == 200:
-                data = response.json()
-                rates = data.get('rates', {})
+            if rates and to_currency in rates:
+                rate = rates[to_currency]
+                
+                # Spara till cache och databas
+                self.save_rate_to_cache(from_currency, to_currency, rate)
+                self.save_rate_to_database(from_currency, to_currency, rate)
                 
-                if to_currency in rates:
-                    rate = rates[to_currency]
-                    
-                    # Spara till cache och databas
-                    self.save_rate_to_cache(from_currency, to_currency, rate)
-                    self.save_rate_to_database(from_currency, to_currency, rate)
-                    
-                    return rate
+                return rate
             
         except Exception as e:
             print(f"Fel vid hämtning från API: {e}")
@@ -234,16 +400,7 @@ class OfflineCurrencyConverter:
     
     def get_fallback_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
         """Hämtar fallback-kurs"""
-        if from_currency in self.fallback_rates:
-            if to_currency in self.fallback_rates[from_currency]:
-                return self.fallback_rates[from_currency][to_currency]
-        
-        # Omvänd kurs
-        if to_currency in self.fallback_rates:
-            if from_currency in self.fallback_rates[to_currency]:
-                return 1 / self.fallback_rates[to_currency][from_currency]
-        
-        return None
+        return _FALLBACK_PAIRS.get(f"{from_currency}_{to_currency}")
     
     def get_exchange_rate(self, from_currency: str, to_currency: str, force_online: bool = False) -> float:
         """Hämtar valutakurs med offline-stöd"""
@@ -292,6 +449,9 @@ class OfflineCurrencyConverter:
     
     def get_available_currencies(self) -> List[str]:
         """Returnerar lista över tillgängliga valutor"""
+        if self._currencies_cache is not None:
+            return list(self._currencies_cache)
+        
         currencies = set()
         
         # Lägg till alla valutor från fallback-rates
@@ -301,23 +461,23 @@ class OfflineCurrencyConverter:
         
         # Lägg till valutor från databas
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT DISTINCT from_currency FROM currency_rates')
-            for row in cursor.fetchall():
-                currencies.add(row[0])
-            
-            cursor.execute('SELECT DISTINCT to_currency FROM currency_rates')
-            for row in cursor.fetchall():
-                currencies.add(row[0])
-            
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                cursor.execute('SELECT DISTINCT from_currency FROM currency_rates')
+                for row in cursor.fetchall():
+                    currencies.add(row[0])
+                
+                cursor.execute('SELECT DISTINCT to_currency FROM currency_rates')
+                for row in cursor.fetchall():
+                    currencies.add(row[0])
             
         except Exception as e:
             print(f"Fel vid hämtning av valutor från databas: {e}")
+            return sorted(currencies)
         
-        return sorted(list(currencies))
+        self._currencies_cache = sorted(currencies)
+        return list(self._currencies_cache)
     
     def update_all_rates(self) -> Dict:
         """Uppdaterar alla valutakurser från API"""
@@ -330,45 +490,54 @@ class OfflineCurrencyConverter:
         base_currencies = ['SEK', 'USD', 'EUR', 'GBP']
         target_currencies = ['SEK', 'USD', 'EUR', 'GBP', 'NOK', 'DKK']
         
+        # API:t returnerar alla kurser för en bas i ett svar, så hämta en gång
+        # per basvaluta och kör anropen parallellt
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {base: executor.submit(self._fetch_base, base) for base in base_currencies}
+        
+        # Spara resultaten i huvudtråden så att cache och databas inte skrivs samtidigt
+        rows = []
         for base in base_currencies:
+            try:
+                rates = futures[base].result()
+            except Exception as e:
+                for target in target_currencies:
+                    if base != target:
+                        results['failed'] += 1
+                        results['errors'].append(f"Fel för {base}->{target}: {e}")
+                continue
+            
             for target in target_currencies:
                 if base != target:
-                    try:
-                        rate = self.fetch_rate_from_api(base, target)
-                        if rate:
-                            results['successful'] += 1
-                        else:
-                            results['failed'] += 1
-                            results['errors'].append(f"Kunde inte hämta {base}->{target}")
-                    except Exception as e:
+                    rate = rates.get(target) if rates else None
+                    if rate:
+                        self.save_rate_to_cache(base, target, rate)
+                        rows.append((base, target, rate, 'api'))
+                        results['successful'] += 1
+                    else:
                         results['failed'] += 1
-                        results['errors'].append(f"Fel för {base}->{target}: {e}")
+                        results['errors'].append(f"Kunde inte hämta {base}->{target}")
+        
+        self.save_rates_to_database(rows)
+        self.flush()
         
         return results
     
-    def get_rate_history(self, from_currency: str, to_currency: str, days: int = 30) -> List[Dict]:
-        """Hämtar historik för valutakurs"""
+    def get_rate_history(self, from_currency: str, to_currency: str, days: int = 30) -> List[Tuple[float, str, str]]:
+        """Hämtar historik för valutakurs som (kurs, tidsstämpel, källa)-tupler"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            cursor.execute('''
-                SELECT rate, timestamp, source FROM currency_rates 
-                WHERE from_currency = ? AND to_currency = ? AND timestamp > ?
-                ORDER BY timestamp ASC
-            ''', (from_currency, to_currency, cutoff_date.isoformat()))
-            
-            history = []
-            for row in cursor.fetchall():
-                history.append({
-                    'rate': row[0],
-                    'timestamp': row[1],
-                    'source': row[2]
-                })
-            
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                cutoff_date = datetime.now() - timedelta(days=days)
+                
+                cursor.execute('''
+                    SELECT rate, timestamp, source FROM currency_rates 
+                    WHERE from_currency = ? AND to_currency = ? AND timestamp > ?
+                    ORDER BY timestamp ASC
+                ''', (from_currency, to_currency, cutoff_date.isoformat()))
+                
+                history = cursor.fetchall()
             return history
             
         except Exception as e:
@@ -378,47 +547,63 @@ class OfflineCurrencyConverter:
     def cleanup_old_rates(self, days: int = 90):
         """Rensar gamla valutakurser från databas"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            cursor.execute('''
-                DELETE FROM currency_rates 
-                WHERE timestamp < ?
-            ''', (cutoff_date.isoformat(),))
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                
+                cutoff_date = datetime.now() - timedelta(days=days)
+                
+                cursor.execute('''
+                    DELETE FROM currency_rates 
+                    WHERE timestamp < ?
+                ''', (cutoff_date.isoformat(),))
+                
+                deleted_count = cursor.rowcount
+            self._currencies_cache = None
             
             print(f"Tog bort {deleted_count} gamla valutakurser")
             
         except Exception as e:
             print(f"Fel vid rensning av gamla kurser: {e}")
     
-    def get_offline_status(self) -> Dict:
-        """Returnerar status för offline-läge"""
+    def is_online(self) -> bool:
+        """Kontrollerar anslutningen mot valuta-API:t; resultatet återanvänds en stund"""
+        now = time.time()
+        if now < self._online_checked_until:
+            return self._online
+        
         try:
-            # Testa internetanslutning
-            response = requests.get("https://httpbin.org/get", timeout=5)
-            online = response.status_code == 200
-        except:
+            # HEAD laddar inte ner någon svarskropp
+            response = self.session.head("https://api.exchangerate-api.com", timeout=2,
+                                         allow_redirects=False)
+            online = response.status_code < 500
+        except Exception:
             online = False
         
-        # Kontrollera cache-status
+        self._online = online
+        self._online_checked_until = now + self.ONLINE_CHECK_TTL
+        return online
+    
+    def get_offline_status(self, check_online: bool = True) -> Dict:
+        """Returnerar status för offline-läge"""
+        # Utan check_online rapporteras senast kända status utan nätverksanrop
+        online = self.is_online() if check_online else self._online
+        
+        # Kontrollera cache-status; samma gräns som is_cache_valid men utan anrop per post
+        cutoff = time.time() - 24 * 3600
         cache_stats = {
             'total_cached_pairs': len(self.cache),
-            'valid_cached_pairs': sum(1 for key in self.cache if self.is_cache_valid(*key.split('_')))
+            'valid_cached_pairs': sum(
+                1 for entry in self.cache.values()
+                if isinstance(entry, dict) and entry.get('ts_epoch', 0) > cutoff
+            )
         }
         
         # Kontrollera databas-status
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM currency_rates')
-            db_count = cursor.fetchone()[0]
-            conn.close()
+            with self._db_lock, self._conn:
+                cursor = self._conn.cursor()
+                cursor.execute('SELECT COUNT(*) FROM currency_rates')
+                db_count = cursor.fetchone()[0]
         except:
             db_count = 0
         
@@ -432,6 +617,10 @@ class OfflineCurrencyConverter:
 # Hjälpfunktioner för GUI-integration
 def create_currency_widget(parent, converter: OfflineCurrencyConverter):
     """Skapar en widget för valutakonvertering"""
+    # tkinter importeras här så att modulen kan användas utan GUI
+    import tkinter as tk
+    from tkinter import ttk
+    
     frame = ttk.LabelFrame(parent, text="Valutakonvertering", padding=10)
     
     # Input-fält
@@ -5,92 +5,275 @@ Statistik och grafer för utgiftshanteraren
 Använder matplotlib för visualisering
 """
 
-import matplotlib.pyplot as plt
+import matplotlib
 import matplotlib.dates as mdates
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-from datetime import datetime, timedelta
+from _agg_numba import NUMBA_MIN_ROWS, sum_by_key
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
+import functools
+import importlib.util
 import json
 import os
+import re
 
-try:
-    import seaborn as sns
-    SEABORN_AVAILABLE = True
-    # Sätt seaborn-stil
-    sns.set_style("whitegrid")
-    sns.set_palette("husl")
-except ImportError:
-    SEABORN_AVAILABLE = False
+# seaborn (som drar in scipy och pandas) importeras först när en graf ritas
+SEABORN_AVAILABLE = importlib.util.find_spec("seaborn") is not None
+
+# Datum och eventuell tid ('ÅÅÅÅ-MM-DD[THH:MM[:SS]]') utan bråkdelar och tidszon
+_LOCAL_ISO_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?)?')
+
+def _empty_figure() -> Figure:
+    """Liten graf som visar att gruppen saknar data"""
+    fig = Figure(figsize=(4, 2))
+    fig.text(0.5, 0.5, 'Ingen data', ha='center', va='center')
+    return fig
+
+def _group_sum(keys: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Summerar och räknar values per unik nyckel; returnerar (nycklar, summor, antal, kod per rad)"""
+    # Koderna är index i de sorterade nycklarna, som kategorikoder i pandas
+    uniq, codes = np.unique(keys, return_inverse=True)
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if codes.size >= NUMBA_MIN_ROWS:
+        totals = sum_by_key(codes, values, uniq.size)
+    else:
+        totals = np.bincount(codes, weights=values, minlength=uniq.size)
+    counts = np.bincount(codes, minlength=uniq.size)
+    return uniq, totals, counts, codes
+
+@functools.lru_cache(maxsize=32)
+def _palette(name: str, n: int) -> np.ndarray:
+    """Ger n jämnt fördelade färger ur färgkartan name; cachas per (name, n)"""
+    colors = matplotlib.colormaps[name](np.linspace(0, 1, n))
+    # Samma array delas mellan anrop och får därför inte ändras
+    colors.flags.writeable = False
+    return colors
+
+def _parse_dates(values: List[Optional[str]]) -> np.ndarray:
+    """Tolkar ISO-datumsträngar till datetime64[s] i ett enda NumPy-anrop; ogiltiga blir NaT"""
+    # Bråkdelar och tidszon (även 'Z') tas bort så att lokal tid behålls, som
+    # när datumen tolkades med fromisoformat
+    matches = [_LOCAL_ISO_RE.match(v) if v else None for v in values]
+    values = [m.group(0) if m else 'NaT' for m in matches]
+    try:
+        return np.array(values, dtype='datetime64[s]')
+    except ValueError:
+        pass
+    
+    # Någon sträng gick inte att tolka; ta raderna en och en
+    dates = np.empty(len(values), dtype='datetime64[s]')
+    for i, value in enumerate(values):
+        try:
+            dates[i] = np.datetime64(value, 's')
+        except ValueError:
+            dates[i] = np.datetime64('NaT')
+    return dates
+
+def _m4_downsample(x: np.ndarray, y: np.ndarray, width_px: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Behåller första, sista, minsta och största punkten per pixelkolumn (M4)"""
+    n = y.size
+    if width_px < 1 or n <= 4 * width_px:
+        return x, y
+    
+    # x är sorterad, så varje pixelkolumn är ett sammanhängande intervall
+    bins = (np.arange(n) * width_px) // n
+    columns = np.arange(width_px)
+    starts = np.searchsorted(bins, columns)
+    ends = np.searchsorted(bins, columns, side='right')
+    # Sorterat på kolumn och sedan värde ligger min först och max sist i varje kolumn
+    order = np.lexsort((y, bins))
+    keep = np.unique(np.concatenate((starts, ends - 1, order[starts], order[ends - 1])))
+    return x[keep], y[keep]
+
+def _cached_figure(func):
+    """Dekorator som återanvänder en ritad graf tills databasen ändras"""
+    @functools.wraps(func)
+    def wrapper(self, group_id: int) -> Figure:
+        key = (func.__name__, group_id, self._db_state())
+        fig = self._fig_cache.get(key)
+        if fig is not None:
+            self._fig_cache.move_to_end(key)
+            return fig
+        
+        # Stil och typsnitt sätts först när något faktiskt ska ritas
+        self.setup_matplotlib()
+        
+        # En graf för samma metod och grupp men äldre databastillstånd ritas om
+        # på plats i stället för att en ny Figure skapas
+        stale = next((k for k in self._fig_cache if k[:2] == key[:2]), None)
+        self._recycled_fig = self._fig_cache.pop(stale) if stale else None
+        try:
+            fig = func(self, group_id)
+        finally:
+            self._recycled_fig = None
+        self._fig_cache[key] = fig
+        if len(self._fig_cache) > self.FIGURE_CACHE_SIZE:
+            self._fig_cache.popitem(last=False)
+        return fig
+    return wrapper
 
 class ExpenseStatistics:
     """Hanterar statistik och grafer för utgifter"""
     
+    # Max antal ritade grafer som sparas (LRU)
+    FIGURE_CACHE_SIZE = 8
+    # Seaborn-stilen är global och sätts bara en gång per process
+    _seaborn_ready = False
+    
     def __init__(self, database_manager):
         self.db = database_manager
-        self.setup_matplotlib()
+        # Databasläsningar per (typ, group_id), giltiga för ett databastillstånd
+        self._cache = {}
+        self._cache_state = None
+        # Ritade grafer per (metod, group_id, databastillstånd)
+        self._fig_cache = OrderedDict()
+        # Inaktuell graf som nästa _figure-anrop får rensa och återanvända
+        self._recycled_fig = None
     
     def setup_matplotlib(self):
         """Sätter upp matplotlib för svenska tecken"""
-        plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial Unicode MS', 'sans-serif']
-        plt.rcParams['axes.unicode_minus'] = False
+        if SEABORN_AVAILABLE and not ExpenseStatistics._seaborn_ready:
+            # Sätts även om importen misslyckas så att den inte provas vid varje graf
+            ExpenseStatistics._seaborn_ready = True
+            try:
+                import seaborn as sns
+                sns.set_style("whitegrid")
+                sns.set_palette("husl")
+            except ImportError:
+                # seaborn finns men går inte att importera (t.ex. trasig pandas); rita utan stil
+                pass
+        
+        # Efter seaborn, som annars skriver över typsnittet
+        matplotlib.rcParams['font.family'] = ['DejaVu Sans', 'Arial Unicode MS', 'sans-serif']
+        matplotlib.rcParams['axes.unicode_minus'] = False
+    
+    def _db_state(self) -> Tuple[int, Optional[int]]:
+        """Databasversion och databasfilens ändringstid"""
+        # Ändringstiden fångar även när filen skrivs över utanför DatabaseManager,
+        # t.ex. när BackupManager återställer en säkerhetskopia
+        try:
+            mtime = os.stat(self.db.db_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (self.db.version, mtime)
+    
+    def _cached(self, kind: str, group_id: int, loader):
+        """Returnerar loader(group_id) från cachen så länge databasen är oförändrad"""
+        state = self._db_state()
+        if state != self._cache_state:
+            self._cache.clear()
+            self._cache_state = state
+        
+        key = (kind, group_id)
+        if key not in self._cache:
+            self._cache[key] = loader(group_id)
+        return self._cache[key]
     
+    def _expenses(self, group_id: int) -> List[Dict]:
+        """Hämtar gruppens utgifter via cachen"""
+        return self._cached('expenses', group_id, self.db.get_expenses)
+    
+    def _participants(self, group_id: int) -> List[Dict]:
+        """Hämtar gruppens deltagare via cachen"""
+        return self._cached('participants', group_id, self.db.get_participants)
+    
+    def _balances(self, group_id: int) -> List[Dict]:
+        """Hämtar deltagarnas saldon via cachen"""
+        return self._cached('balances', group_id, self.db.get_participant_balances)
+    
+    def _fetch_parallel(self, *loaders):
+        """Kör oberoende datahämtningar i trådar och returnerar resultaten i samma ordning"""
+        # sqlite3 och NumPy släpper GIL, så frågorna kan överlappa; själva
+        # ritandet sker sedan i anropande tråd eftersom matplotlib inte är trådsäkert
+        with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+            futures = [executor.submit(loader) for loader in loaders]
+            return [future.result() for future in futures]
+    
+    def _figure(self, figsize: Tuple[int, int], nrows: int, ncols: int):
+        """Ger en Figure med axlar; återanvänder en inaktuell graf med ax.cla() om det finns en"""
+        fig = self._recycled_fig
+        if fig is None or len(fig.axes) != nrows * ncols:
+            fig = Figure(figsize=figsize)
+            return fig, fig.subplots(nrows, ncols)
+        
+        for ax in fig.axes:
+            ax.cla()
+        # Samma form som fig.subplots ger: (2, 2) eller (2,) för en kolumn
+        return fig, np.array(fig.axes).reshape(nrows, ncols).squeeze()
+    
+    def _totals(self, kind: str, group_id: int) -> Tuple[List, List[float], List[int]]:
+        """Hämtar (nycklar, summor, antal) aggregerade i SQL; kind är category, payer, monthly eller daily"""
+        rows = self._cached(f'{kind}_totals', group_id, getattr(self.db, f'get_{kind}_totals'))
+        if not rows:
+            return [], [], []
+        keys, totals, counts = zip(*rows)
+        return list(keys), list(totals), list(counts)
+    
+    def _load_expense_array(self, group_id: int) -> np.ndarray:
+        """Hämtar gruppens utgifter som strukturerad NumPy-array via cachen"""
+        return self._cached('expense_array', group_id, self._build_expense_array)
+    
+    def _build_expense_array(self, group_id: int) -> np.ndarray:
+        """Läser gruppens utgifter till en strukturerad NumPy-array"""
+        expenses = self._expenses(group_id)
+        payers = [exp['paid_by'] for exp in expenses]
+        categories = [exp['category'] or 'Okategoriserad' for exp in expenses]
+        # Strängfälten dimensioneras efter längsta värdet så att inget kapas
+        arr = np.empty(len(expenses), dtype=[
+            ('amount', 'f8'),
+            ('paid_by', f"U{max(map(len, payers), default=1) or 1}"),
+            ('category', f"U{max(map(len, categories), default=1) or 1}"),
+            ('date', 'datetime64[s]')
+        ])
+        arr['amount'] = [exp['amount'] for exp in expenses]
+        arr['paid_by'] = payers
+        arr['category'] = categories
+        arr['date'] = _parse_dates([exp['date'] for exp in expenses])
+        return arr
+    
+    @_cached_figure
     def create_expense_overview_chart(self, group_id: int) -> Figure:
         """Skapar översiktsgraf för utgifter"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-        fig.suptitle('Utgiftsöversikt', fontsize=16, fontweight='bold')
+        # Hämta data, summerad per kategori, dag och betalare i databasen
+        category_data, daily_data, payer_data, balances = self._fetch_parallel(
+            functools.partial(self._totals, 'category', group_id),
+            functools.partial(self._totals, 'daily', group_id),
+            functools.partial(self._totals, 'payer', group_id),
+            functools.partial(self._balances, group_id)
+        )
+        categories, category_amounts, _ = category_data
+        days, daily_amounts, _ = daily_data
+        payers, payer_amounts, _ = payer_data
+        
+        # Tom grupp: hoppa över axlarna helt
+        if not categories and not balances:
+            return _empty_figure()
         
-        # Hämta data
-        expenses = self.db.get_expenses(group_id)
-        participants = self.db.get_participants(group_id)
-        balances = self.db.get_participant_balances(group_id)
+        fig, ((ax1, ax2), (ax3, ax4)) = self._figure((12, 8), 2, 2)
+        fig.suptitle('Utgiftsöversikt', fontsize=16, fontweight='bold')
         
         # 1. Utgifter per kategori (cirkeldiagram)
-        category_totals = {}
-        for exp in expenses:
-            category = exp['category'] or 'Okategoriserad'
-            if category not in category_totals:
-                category_totals[category] = 0
-            category_totals[category] += exp['amount']
-        
-        if category_totals:
-            categories = list(category_totals.keys())
-            amounts = list(category_totals.values())
-            colors = plt.cm.Set3(np.linspace(0, 1, len(categories)))
+        if categories:
+            colors = _palette('Set3', len(categories))
             
-            ax1.pie(amounts, labels=categories, autopct='%1.1f%%', colors=colors)
+            ax1.pie(category_amounts, labels=categories, autopct='%1.1f%%', colors=colors)
             ax1.set_title('Utgifter per kategori')
         
         # 2. Utgifter över tid (linjediagram)
-        if expenses:
-            dates = []
-            amounts = []
-            for exp in expenses:
-                try:
-                    date = datetime.fromisoformat(exp['date'].replace('Z', '+00:00'))
-                    dates.append(date)
-                    amounts.append(exp['amount'])
-                except:
-                    continue
+        if days:
+            # Databasen returnerar dagarna sorterade
+            sorted_dates = np.array(days, dtype='datetime64[D]')
+            # Fler punkter än axeln har pixlar ger ingen ny information, bara ritarbete
+            sorted_dates, daily_amounts = _m4_downsample(sorted_dates, np.asarray(daily_amounts), int(ax2.bbox.width))
             
-            if dates:
-                # Gruppera per dag
-                daily_totals = {}
-                for date, amount in zip(dates, amounts):
-                    date_key = date.date()
-                    if date_key not in daily_totals:
-                        daily_totals[date_key] = 0
-                    daily_totals[date_key] += amount
-                
-                sorted_dates = sorted(daily_totals.keys())
-                daily_amounts = [daily_totals[d] for d in sorted_dates]
-                
-                ax2.plot(sorted_dates, daily_amounts, marker='o', linewidth=2, markersize=6)
-                ax2.set_title('Utgifter över tid')
-                ax2.set_xlabel('Datum')
-                ax2.set_ylabel('Belopp')
-                ax2.tick_params(axis='x', rotation=45)
+            ax2.plot(sorted_dates, daily_amounts, marker='o', linewidth=2, markersize=6)
+            ax2.set_title('Utgifter över tid')
+            ax2.set_xlabel('Datum')
+            ax2.set_ylabel('Belopp')
+            ax2.tick_params(axis='x', rotation=45)
         
         # 3. Saldon per deltagare (stapeldiagram)
         if balances:
@@ -105,286 +288,223 @@ class ExpenseStatistics:
             ax3.tick_params(axis='x', rotation=45)
             
             # Lägg till värden på staplarna
-            for bar, amount in zip(bars, balance_amounts):
-                height = bar.get_height()
-                ax3.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{amount:.0f}', ha='center', va='bottom' if height > 0 else 'top')
+            ax3.bar_label(bars, fmt='%.0f')
         
         # 4. Utgifter per deltagare (stapeldiagram)
-        if expenses:
-            participant_totals = {}
-            for exp in expenses:
-                paid_by = exp['paid_by']
-                if paid_by not in participant_totals:
-                    participant_totals[paid_by] = 0
-                participant_totals[paid_by] += exp['amount']
+        if payers:
+            bars = ax4.bar(payers, payer_amounts, color='skyblue', alpha=0.7)
+            ax4.set_title('Utgifter per deltagare')
+            ax4.set_xlabel('Deltagare')
+            ax4.set_ylabel('Totalt betalat')
+            ax4.tick_params(axis='x', rotation=45)
             
-            if participant_totals:
-                participants = list(participant_totals.keys())
-                amounts = list(participant_totals.values())
-                
-                bars = ax4.bar(participants, amounts, color='skyblue', alpha=0.7)
-                ax4.set_title('Utgifter per deltagare')
-                ax4.set_xlabel('Deltagare')
-                ax4.set_ylabel('Totalt betalat')
-                ax4.tick_params(axis='x', rotation=45)
-                
-                # Lägg till värden på staplarna
-                for bar, amount in zip(bars, amounts):
-                    height = bar.get_height()
-                    ax4.text(bar.get_x() + bar.get_width()/2., height,
-                            f'{amount:.0f}', ha='center', va='bottom')
-        
-        plt.tight_layout()
+            # Lägg till värden på staplarna
+            ax4.bar_label(bars, fmt='%.0f')
+        
+        fig.tight_layout()
         return fig
     
+    @_cached_figure
     def create_monthly_trend_chart(self, group_id: int) -> Figure:
         """Skapar månadsvis trendgraf"""
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+        # Utgifter per månad, summerade i databasen
+        months, totals, counts = self._totals('monthly', group_id)
+        
+        if not months:
+            return _empty_figure()
+        
+        fig, (ax1, ax2) = self._figure((12, 10), 2, 1)
         fig.suptitle('Månadsvis trend', fontsize=16, fontweight='bold')
         
-        expenses = self.db.get_expenses(group_id)
-        
-        if expenses:
-            # Gruppera utgifter per månad
-            monthly_data = {}
-            for exp in expenses:
-                try:
-                    date = datetime.fromisoformat(exp['date'].replace('Z', '+00:00'))
-                    month_key = date.strftime('%Y-%m')
-                    if month_key not in monthly_data:
-                        monthly_data[month_key] = {
-                            'total': 0,
-                            'count': 0,
-                            'categories': {}
-                        }
-                    monthly_data[month_key]['total'] += exp['amount']
-                    monthly_data[month_key]['count'] += 1
-                    
-                    category = exp['category'] or 'Okategoriserad'
-                    if category not in monthly_data[month_key]['categories']:
-                        monthly_data[month_key]['categories'][category] = 0
-                    monthly_data[month_key]['categories'][category] += exp['amount']
-                except:
-                    continue
-            
-            if monthly_data:
-                months = sorted(monthly_data.keys())
-                totals = [monthly_data[m]['total'] for m in months]
-                counts = [monthly_data[m]['count'] for m in months]
-                
-                # 1. Totala utgifter per månad
-                ax1.plot(months, totals, marker='o', linewidth=2, markersize=8, color='blue')
-                ax1.set_title('Totala utgifter per månad')
-                ax1.set_ylabel('Belopp')
-                ax1.grid(True, alpha=0.3)
-                
-                # Lägg till värden på punkterna
-                for i, (month, total) in enumerate(zip(months, totals)):
-                    ax1.annotate(f'{total:.0f}', (month, total), 
-                               textcoords="offset points", xytext=(0,10), ha='center')
-                
-                # 2. Antal utgifter per månad
-                ax2.bar(months, counts, color='orange', alpha=0.7)
-                ax2.set_title('Antal utgifter per månad')
-                ax2.set_xlabel('Månad')
-                ax2.set_ylabel('Antal utgifter')
-                ax2.grid(True, alpha=0.3)
-                
-                # Lägg till värden på staplarna
-                for i, (month, count) in enumerate(zip(months, counts)):
-                    ax2.text(month, count, str(count), ha='center', va='bottom')
-        
-        plt.tight_layout()
+        # 1. Totala utgifter per månad
+        ax1.plot(months, totals, marker='o', linewidth=2, markersize=8, color='blue')
+        ax1.set_title('Totala utgifter per månad')
+        ax1.set_ylabel('Belopp')
+        ax1.grid(True, alpha=0.3)
+        
+        # Lägg till värden på punkterna
+        for i, (month, total) in enumerate(zip(months, totals)):
+            ax1.annotate(f'{total:.0f}', (month, total), 
+                       textcoords="offset points", xytext=(0,10), ha='center')
+        
+        # 2. Antal utgifter per månad
+        bars = ax2.bar(months, counts, color='orange', alpha=0.7)
+        ax2.set_title('Antal utgifter per månad')
+        ax2.set_xlabel('Månad')
+        ax2.set_ylabel('Antal utgifter')
+        ax2.grid(True, alpha=0.3)
+        
+        # Lägg till värden på staplarna
+        ax2.bar_label(bars, fmt='%d')
+        
+        fig.tight_layout()
         return fig
     
+    @_cached_figure
     def create_participant_analysis_chart(self, group_id: int) -> Figure:
         """Skapar detaljerad deltagaranalys"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(14, 10))
+        participants, payer_data, balances = self._fetch_parallel(
+            functools.partial(self._participants, group_id),
+            functools.partial(self._totals, 'payer', group_id),
+            functools.partial(self._balances, group_id)
+        )
+        payers, payer_totals, payer_counts = payer_data
+        
+        if not participants or not payers:
+            return _empty_figure()
+        
+        fig, ((ax1, ax2), (ax3, ax4)) = self._figure((14, 10), 2, 2)
         fig.suptitle('Deltagaranalys', fontsize=16, fontweight='bold')
         
-        participants = self.db.get_participants(group_id)
-        expenses = self.db.get_expenses(group_id)
-        balances = self.db.get_participant_balances(group_id)
+        participant_names = [p['name'] for p in participants]
         
-        if participants and expenses:
-            participant_names = [p['name'] for p in participants]
-            
-            # 1. Betalat vs skyldigt per deltagare
-            paid_amounts = []
-            owed_amounts = []
-            
-            for participant in participants:
-                name = participant['name']
-                balance_info = next((b for b in balances if b['name'] == name), None)
-                if balance_info:
-                    paid_amounts.append(balance_info['total_paid'])
-                    owed_amounts.append(balance_info['total_owed'])
-                else:
-                    paid_amounts.append(0)
-                    owed_amounts.append(0)
-            
-            x = np.arange(len(participant_names))
-            width = 0.35
-            
-            ax1.bar(x - width/2, paid_amounts, width, label='Betalt', color='green', alpha=0.7)
-            ax1.bar(x + width/2, owed_amounts, width, label='Skyldigt', color='red', alpha=0.7)
-            ax1.set_xlabel('Deltagare')
-            ax1.set_ylabel('Belopp')
-            ax1.set_title('Betalt vs Skyldigt per deltagare')
-            ax1.set_xticks(x)
-            ax1.set_xticklabels(participant_names, rotation=45)
-            ax1.legend()
-            ax1.grid(True, alpha=0.3)
-            
-            # 2. Antal utgifter per deltagare
-            expense_counts = {}
-            for exp in expenses:
-                paid_by = exp['paid_by']
-                if paid_by not in expense_counts:
-                    expense_counts[paid_by] = 0
-                expense_counts[paid_by] += 1
-            
-            counts = [expense_counts.get(name, 0) for name in participant_names]
-            bars = ax2.bar(participant_names, counts, color='purple', alpha=0.7)
-            ax2.set_title('Antal utgifter per deltagare')
-            ax2.set_xlabel('Deltagare')
-            ax2.set_ylabel('Antal utgifter')
-            ax2.tick_params(axis='x', rotation=45)
-            ax2.grid(True, alpha=0.3)
-            
-            # Lägg till värden på staplarna
-            for bar, count in zip(bars, counts):
-                height = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2., height,
-                        str(count), ha='center', va='bottom')
-            
-            # 3. Genomsnittlig utgift per deltagare
-            avg_amounts = []
-            for name in participant_names:
-                participant_expenses = [exp for exp in expenses if exp['paid_by'] == name]
-                if participant_expenses:
-                    avg_amount = sum(exp['amount'] for exp in participant_expenses) / len(participant_expenses)
-                else:
-                    avg_amount = 0
-                avg_amounts.append(avg_amount)
-            
-            bars = ax3.bar(participant_names, avg_amounts, color='orange', alpha=0.7)
-            ax3.set_title('Genomsnittlig utgift per deltagare')
-            ax3.set_xlabel('Deltagare')
-            ax3.set_ylabel('Genomsnittligt belopp')
-            ax3.tick_params(axis='x', rotation=45)
-            ax3.grid(True, alpha=0.3)
-            
-            # Lägg till värden på staplarna
-            for bar, avg in zip(bars, avg_amounts):
-                height = bar.get_height()
-                ax3.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{avg:.0f}', ha='center', va='bottom')
+        # Summa och antal per betalare från databasen, uppslag per deltagare
+        totals_by_payer = dict(zip(payers, payer_totals))
+        counts_by_payer = dict(zip(payers, payer_counts))
+        
+        # 1. Betalat vs skyldigt per deltagare
+        balance_by_name = {b['name']: b for b in balances}
+        paid_amounts = []
+        owed_amounts = []
+        
+        for participant in participants:
+            name = participant['name']
+            balance_info = balance_by_name.get(name)
+            if balance_info:
+                paid_amounts.append(balance_info['total_paid'])
+                owed_amounts.append(balance_info['total_owed'])
+            else:
+                paid_amounts.append(0)
+                owed_amounts.append(0)
+        
+        x = np.arange(len(participant_names))
+        width = 0.35
+        
+        ax1.bar(x - width/2, paid_amounts, width, label='Betalt', color='green', alpha=0.7)
+        ax1.bar(x + width/2, owed_amounts, width, label='Skyldigt', color='red', alpha=0.7)
+        ax1.set_xlabel('Deltagare')
+        ax1.set_ylabel('Belopp')
+        ax1.set_title('Betalt vs Skyldigt per deltagare')
+        ax1.set_xticks(x)
+        ax1.set_xticklabels(participant_names, rotation=45)
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
+        
+        # 2. Antal utgifter per deltagare
+        counts = [counts_by_payer.get(name, 0) for name in participant_names]
+        bars = ax2.bar(participant_names, counts, color='purple', alpha=0.7)
+        ax2.set_title('Antal utgifter per deltagare')
+        ax2.set_xlabel('Deltagare')
+        ax2.set_ylabel('Antal utgifter')
+        ax2.tick_params(axis='x', rotation=45)
+        ax2.grid(True, alpha=0.3)
+        
+        # Lägg till värden på staplarna
+        ax2.bar_label(bars, fmt='%d')
+        
+        # 3. Genomsnittlig utgift per deltagare
+        avg_amounts = [
+            totals_by_payer[name] / counts_by_payer[name] if name in counts_by_payer else 0
+            for name in participant_names
+        ]
+        
+        bars = ax3.bar(participant_names, avg_amounts, color='orange', alpha=0.7)
+        ax3.set_title('Genomsnittlig utgift per deltagare')
+        ax3.set_xlabel('Deltagare')
+        ax3.set_ylabel('Genomsnittligt belopp')
+        ax3.tick_params(axis='x', rotation=45)
+        ax3.grid(True, alpha=0.3)
+        
+        # Lägg till värden på staplarna
+        ax3.bar_label(bars, fmt='%.0f')
+        
+        # 4. Saldo-distribution (histogram)
+        # float32 räcker för att rita och halverar datamängden
+        balance_values = np.array([bal['balance'] for bal in balances], dtype=np.float32)
+        if balance_values.size:
+            ax4.hist(balance_values, bins=10, color='lightblue', alpha=0.7, edgecolor='black')
+            ax4.set_title('Distribution av saldon')
+            ax4.set_xlabel('Saldo')
+            ax4.set_ylabel('Antal deltagare')
+            ax4.grid(True, alpha=0.3)
             
-            # 4. Saldo-distribution (histogram)
-            balance_values = [bal['balance'] for bal in balances]
-            if balance_values:
-                ax4.hist(balance_values, bins=10, color='lightblue', alpha=0.7, edgecolor='black')
-                ax4.set_title('Distribution av saldon')
-                ax4.set_xlabel('Saldo')
-                ax4.set_ylabel('Antal deltagare')
-                ax4.grid(True, alpha=0.3)
-                
-                # Lägg till vertikal linje för medelvärde
-                mean_balance = np.mean(balance_values)
-                ax4.axvline(mean_balance, color='red', linestyle='--', 
-                           label=f'Medelvärde: {mean_balance:.0f}')
-                ax4.legend()
-        
-        plt.tight_layout()
+            # Lägg till vertikal linje för medelvärde
+            mean_balance = balance_values.mean(dtype=np.float64)
+            ax4.axvline(mean_balance, color='red', linestyle='--', 
+                       label=f'Medelvärde: {mean_balance:.0f}')
+            ax4.legend()
+        
+        fig.tight_layout()
         return fig
     
+    @_cached_figure
     def create_category_analysis_chart(self, group_id: int) -> Figure:
         """Skapar kategorianalys"""
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(14, 10))
+        arr = self._load_expense_array(group_id)
+        
+        if not arr.size:
+            return _empty_figure()
+        
+        fig, ((ax1, ax2), (ax3, ax4)) = self._figure((14, 10), 2, 2)
         fig.suptitle('Kategorianalys', fontsize=16, fontweight='bold')
         
-        expenses = self.db.get_expenses(group_id)
-        
-        if expenses:
-            # Gruppera data per kategori
-            category_data = {}
-            for exp in expenses:
-                category = exp['category'] or 'Okategoriserad'
-                if category not in category_data:
-                    category_data[category] = {
-                        'total': 0,
-                        'count': 0,
-                        'amounts': []
-                    }
-                category_data[category]['total'] += exp['amount']
-                category_data[category]['count'] += 1
-                category_data[category]['amounts'].append(exp['amount'])
-            
-            categories = list(category_data.keys())
-            totals = [category_data[cat]['total'] for cat in categories]
-            counts = [category_data[cat]['count'] for cat in categories]
-            
-            # 1. Totala utgifter per kategori (stapeldiagram)
-            bars = ax1.bar(categories, totals, color='lightcoral', alpha=0.7)
-            ax1.set_title('Totala utgifter per kategori')
-            ax1.set_xlabel('Kategori')
-            ax1.set_ylabel('Totalt belopp')
-            ax1.tick_params(axis='x', rotation=45)
-            ax1.grid(True, alpha=0.3)
-            
-            # Lägg till värden på staplarna
-            for bar, total in zip(bars, totals):
-                height = bar.get_height()
-                ax1.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{total:.0f}', ha='center', va='bottom')
-            
-            # 2. Antal utgifter per kategori (cirkeldiagram)
-            if counts:
-                colors = plt.cm.Pastel1(np.linspace(0, 1, len(categories)))
-                wedges, texts, autotexts = ax2.pie(counts, labels=categories, autopct='%1.1f%%', 
-                                                   colors=colors, startangle=90)
-                ax2.set_title('Antal utgifter per kategori')
-            
-            # 3. Genomsnittlig utgift per kategori
-            avg_amounts = []
-            for cat in categories:
-                amounts = category_data[cat]['amounts']
-                avg_amount = sum(amounts) / len(amounts) if amounts else 0
-                avg_amounts.append(avg_amount)
-            
-            bars = ax3.bar(categories, avg_amounts, color='lightgreen', alpha=0.7)
-            ax3.set_title('Genomsnittlig utgift per kategori')
-            ax3.set_xlabel('Kategori')
-            ax3.set_ylabel('Genomsnittligt belopp')
-            ax3.tick_params(axis='x', rotation=45)
-            ax3.grid(True, alpha=0.3)
+        # Gruppera data per kategori
+        category_keys, totals, counts, codes = _group_sum(arr['category'], arr['amount'])
+        categories = category_keys.tolist()
+        
+        # 1. Totala utgifter per kategori (stapeldiagram)
+        bars = ax1.bar(categories, totals, color='lightcoral', alpha=0.7)
+        ax1.set_title('Totala utgifter per kategori')
+        ax1.set_xlabel('Kategori')
+        ax1.set_ylabel('Totalt belopp')
+        ax1.tick_params(axis='x', rotation=45)
+        ax1.grid(True, alpha=0.3)
+        
+        # Lägg till värden på staplarna
+        ax1.bar_label(bars, fmt='%.0f')
+        
+        # 2. Antal utgifter per kategori (cirkeldiagram)
+        if counts.size:
+            colors = _palette('Pastel1', len(categories))
+            wedges, texts, autotexts = ax2.pie(counts, labels=categories, autopct='%1.1f%%', 
+                                               colors=colors, startangle=90)
+            ax2.set_title('Antal utgifter per kategori')
+        
+        # 3. Genomsnittlig utgift per kategori
+        avg_amounts = totals / np.maximum(counts, 1)
+        
+        bars = ax3.bar(categories, avg_amounts, color='lightgreen', alpha=0.7)
+        ax3.set_title('Genomsnittlig utgift per kategori')
+        ax3.set_xlabel('Kategori')
+        ax3.set_ylabel('Genomsnittligt belopp')
+        ax3.tick_params(axis='x', rotation=45)
+        ax3.grid(True, alpha=0.3)
+        
+        # Lägg till värden på staplarna
+        ax3.bar_label(bars, fmt='%.0f')
+        
+        # 4. Utgiftsfördelning (boxplot)
+        if len(categories) > 1:
+            # En stabil sortering på kod och sedan delning vid varje kategorigräns
+            # ger beloppen per kategori utan en mask per kategori
+            # float32 räcker för att rita; summor och statistik använder float64
+            sorted_amounts = arr['amount'].astype(np.float32)[np.argsort(codes, kind='stable')]
+            amounts_by_category = np.split(sorted_amounts, np.cumsum(counts)[:-1])
+            box_plot = ax4.boxplot(amounts_by_category, labels=categories, patch_artist=True)
             
-            # Lägg till värden på staplarna
-            for bar, avg in zip(bars, avg_amounts):
-                height = bar.get_height()
-                ax3.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{avg:.0f}', ha='center', va='bottom')
+            # Färglägg boxarna
+            colors = _palette('Set3', len(categories))
+            for patch, color in zip(box_plot['boxes'], colors):
+                patch.set_facecolor(color)
+                patch.set_alpha(0.7)
             
-            # 4. Utgiftsfördelning (boxplot)
-            if len(categories) > 1:
-                amounts_by_category = [category_data[cat]['amounts'] for cat in categories]
-                box_plot = ax4.boxplot(amounts_by_category, labels=categories, patch_artist=True)
-                
-                # Färglägg boxarna
-                colors = plt.cm.Set3(np.linspace(0, 1, len(categories)))
-                for patch, color in zip(box_plot['boxes'], colors):
-                    patch.set_facecolor(color)
-                    patch.set_alpha(0.7)
-                
-                ax4.set_title('Utgiftsfördelning per kategori')
-                ax4.set_xlabel('Kategori')
-                ax4.set_ylabel('Belopp')
-                ax4.tick_params(axis='x', rotation=45)
-                ax4.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
+            ax4.set_title('Utgiftsfördelning per kategori')
+            ax4.set_xlabel('Kategori')
+            ax4.set_ylabel('Belopp')
+            ax4.tick_params(axis='x', rotation=45)
+            ax4.grid(True, alpha=0.3)
+        
+        fig.tight_layout()
         return fig
     
     def save_chart_as_image(self, fig: Figure, filename: str, dpi: int = 300) -> bool:
@@ -398,62 +518,57 @@ class ExpenseStatistics:
     
     def create_summary_statistics(self, group_id: int) -> Dict:
         """Skapar sammanfattande statistik"""
-        expenses = self.db.get_expenses(group_id)
-        participants = self.db.get_participants(group_id)
-        balances = self.db.get_participant_balances(group_id)
+        arr = self._load_expense_array(group_id)
+        participants = self._participants(group_id)
+        balances = self._balances(group_id)
         
-        if not expenses:
+        if not arr.size:
             return {}
         
         # Grundläggande statistik
-        total_expenses = sum(exp['amount'] for exp in expenses)
-        avg_expense = total_expenses / len(expenses)
-        max_expense = max(exp['amount'] for exp in expenses)
-        min_expense = min(exp['amount'] for exp in expenses)
+        amounts = arr['amount']
+        total_expenses = float(amounts.sum())
+        avg_expense = float(amounts.mean())
+        max_expense = float(amounts.max())
+        min_expense = float(amounts.min())
         
         # Kategoristatistik
-        category_stats = {}
-        for exp in expenses:
-            category = exp['category'] or 'Okategoriserad'
-            if category not in category_stats:
-                category_stats[category] = {'total': 0, 'count': 0}
-            category_stats[category]['total'] += exp['amount']
-            category_stats[category]['count'] += 1
-        
-        # Deltagarstatistik
+        categories, category_totals, category_counts, _ = _group_sum(arr['category'], amounts)
+        category_stats = {
+            category: {'total': total, 'count': count}
+            for category, total, count in zip(categories.tolist(), category_totals.tolist(), category_counts.tolist())
+        }
+        
+        # Deltagarstatistik, grupperad per betalare en gång och sedan slagen upp per deltagare
+        payers, payer_totals, payer_counts, _ = _group_sum(arr['paid_by'], amounts)
+        by_payer = dict(zip(payers.tolist(), zip(payer_totals.tolist(), payer_counts.tolist())))
         participant_stats = {}
         for p in participants:
-            participant_expenses = [exp for exp in expenses if exp['paid_by'] == p['name']]
+            total_paid, count = by_payer.get(p['name'], (0, 0))
             participant_stats[p['name']] = {
-                'total_paid': sum(exp['amount'] for exp in participant_expenses),
-                'expense_count': len(participant_expenses),
-                'avg_expense': sum(exp['amount'] for exp in participant_expenses) / len(participant_expenses) if participant_expenses else 0
+                'total_paid': total_paid,
+                'expense_count': count,
+                'avg_expense': total_paid / count if count else 0
             }
         
         # Tidsstatistik
-        dates = []
-        for exp in expenses:
-            try:
-                date = datetime.fromisoformat(exp['date'].replace('Z', '+00:00'))
-                dates.append(date)
-            except:
-                continue
-        
-        if dates:
-            date_range = max(dates) - min(dates)
-            expenses_per_day = len(expenses) / max(date_range.days, 1)
+        dates = arr['date'][~np.isnat(arr['date'])]
+        if dates.size:
+            # Hela dagar mellan första och sista utgiften, som timedelta.days
+            date_range_days = int((dates.max() - dates.min()) // np.timedelta64(1, 'D'))
+            expenses_per_day = arr.size / max(date_range_days, 1)
         else:
-            date_range = timedelta(0)
+            date_range_days = 0
             expenses_per_day = 0
         
         return {
             'total_expenses': total_expenses,
-            'expense_count': len(expenses),
+            'expense_count': int(arr.size),
             'participant_count': len(participants),
             'avg_expense': avg_expense,
             'max_expense': max_expense,
             'min_expense': min_expense,
-            'date_range_days': date_range.days,
+            'date_range_days': date_range_days,
             'expenses_per_day': expenses_per_day,
             'category_stats': category_stats,
             'participant_stats': participant_stats,
@@ -468,7 +583,8 @@ class ExpenseStatistics:
 def create_chart_widget(parent, fig: Figure) -> FigureCanvasTkAgg:
     """Skapar en Tkinter-widget för att visa matplotlib-graf"""
     canvas = FigureCanvasTkAgg(fig, parent)
-    canvas.draw()
+    # Slå ihop omritningar till en när Tk är ledigt
+    canvas.draw_idle()
     return canvas
 
 def check_matplotlib_availability() -> bool:
@@ -6,6 +6,9 @@ Testfil för databasen
 
 import sys
 import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
 
 # Lägg till projektmappen i Python-sökvägen
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -73,5 +76,49 @@ def test_database():
         import traceback
         traceback.print_exc()
 
+def test_grouped_totals():
+    """Testar summeringar per kategori, betalare, månad och dag"""
+    print("=" * 50)
+    print("TESTING GROUPED TOTALS")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "totals.db"))
+        group_id = db.create_group("Summor")
+        
+        # Tid med tidszon ska behålla sitt lokala datum, inte räknas om till UTC
+        tz = timezone(timedelta(hours=2))
+        db.add_expense(group_id, "Middag", 100.0, "SEK", "Anna", "Mat",
+                       date=datetime(2024, 2, 1, 0, 30, tzinfo=tz))
+        
+        # Tom kategori, NULL-kategori, 'Z'-tid och ogiltigt datum läggs in direkt
+        with sqlite3.connect(db.db_path) as conn:
+            conn.executemany('''
+                INSERT INTO expenses (group_id, description, amount, currency, paid_by, category, date)
+                VALUES (?, ?, ?, 'SEK', ?, ?, ?)
+            ''', [
+                (group_id, "Taxi", 50.0, "Bo", "", "2024-02-03T10:00:00Z"),
+                (group_id, "Biljett", 25.0, "Anna", None, "2024-03-05"),
+                (group_id, "Felaktig", 10.0, "Bo", "Mat", "2024-02-30"),
+            ])
+        
+        assert db.get_category_totals(group_id) == [("Mat", 110.0, 2), ("Okategoriserad", 75.0, 2)]
+        print("✓ Summor per kategori")
+        
+        assert db.get_payer_totals(group_id) == [("Anna", 125.0, 2), ("Bo", 60.0, 2)]
+        print("✓ Summor per betalare")
+        
+        # Det ogiltiga datumet 2024-02-30 ska inte räknas in per månad eller dag
+        assert db.get_monthly_totals(group_id) == [("2024-02", 150.0, 2), ("2024-03", 25.0, 1)]
+        print("✓ Summor per månad")
+        
+        assert db.get_daily_totals(group_id) == [
+            ("2024-02-01", 100.0, 1),
+            ("2024-02-03", 50.0, 1),
+            ("2024-03-05", 25.0, 1),
+        ]
+        print("✓ Summor per dag")
+
 if __name__ == "__main__":
-    test_database()
\ No newline at end of file
+    test_database()
+    test_grouped_totals()
\ No newline at end of file